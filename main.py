@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 from src.recommender import ZomatoRecommender
 from src.evaluation import Evaluator
@@ -19,14 +20,18 @@ def main():
 
     # Evaluation
     ev = Evaluator()
-    hit_rate = ev.evaluate_hit_rate(df, rec, sample_size=200)
+    # Every row as a query, split across the available cores
+    hit_rate = ev.evaluate_hit_rate(df, rec, sample_size=None, workers=os.cpu_count() or 1)
     print(f"Hit-rate: {hit_rate:.2%}")
+    ranking = ev.evaluate_ranking(df, rec, k=10)
+    print("Ranking metrics:", ranking)
 
     # A/B test two weightings (identical here as a placeholder)
     ab = ev.run_ab_test(
         df,
-        rec_a=lambda **kw: rec.recommend(**{**kw, 'top_n': 3}),
-        rec_b=lambda **kw: rec.recommend(**{**kw, 'top_n': 3})
+        rec_a=lambda queries: rec.recommend_batch([{**q, 'top_n': 3} for q in queries]),
+        rec_b=lambda queries: rec.recommend_batch([{**q, 'top_n': 3} for q in queries]),
+        cohort_size=50
     )
     print("A/B test:", ab)
 
@@ -35,10 +40,25 @@ def main():
         f.write("# Evaluation Report\n\n")
         f.write(f"- Hit-rate: **{hit_rate:.2%}**\n")
         f.write(f"- A/B delta in satisfaction: **{float(ab['delta']):.2f}** points\n")
+        f.write("\n## Ranking metrics\n")
+        for name, value in ranking.items():
+            f.write(f"- {name}: {value:.4f}\n" if isinstance(value, float) else f"- {name}: {value}\n")
         f.write("\n## Raw metrics\n")
         f.write(f"- Satisfaction scores: {list(map(float, ev.metrics['satisfaction_scores']))}\n")
         f.write(f"- Usability feedback: {ev.metrics['usability_feedback']}\n")
 
+        # Performance data collected during the evaluation runs
+        perf = ev.metrics['performance']
+        f.write("\n## Performance\n")
+        f.write(f"- Hit-rate run: {perf['hit_rate']['ms_per_query']:.3f} ms/query "
+                f"over {perf['hit_rate']['queries']} queries\n")
+        f.write(f"- A/B run: cohort 1 {perf['ab_test']['cohort1_ms_per_query']:.3f} ms/query, "
+                f"cohort 2 {perf['ab_test']['cohort2_ms_per_query']:.3f} ms/query\n")
+        f.write("\n| stage | count | mean ms | p95 ms |\n|---|---|---|---|\n")
+        for stage, s in perf['hit_rate']['stages']['stages_ms'].items():
+            f.write(f"| {stage} | {s['count']} | {s['mean']:.3f} | {s['p95']:.3f} |\n")
+        f.write(f"\n- Fallbacks: {perf['hit_rate']['stages']['fallbacks']}\n")
+
     print("Wrote evaluation_report.md")
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+import argparse
+import json
+import platform
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from src.recommender import ZomatoRecommender
+
+
+def synthesize(data: pd.DataFrame, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Scale the cleaned dataset to `n_rows` by resampling rows with
+    replacement and jittering ratings, votes and coordinates, so the
+    category mix matches the real data but rows are not exact copies.
+    """
+    rng = np.random.default_rng(seed)
+    picked = rng.integers(0, len(data), n_rows)
+    synthetic = data.iloc[picked].reset_index(drop=True)
+
+    # Keep names distinguishable so ties are broken as on real data
+    copy_no = pd.Series(picked).groupby(picked).cumcount().to_numpy()
+    synthetic['Restaurant Name'] = np.where(
+        copy_no > 0,
+        synthetic['Restaurant Name'] + ' #' + copy_no.astype(str),
+        synthetic['Restaurant Name']
+    )
+    rating = synthetic['Rating'].to_numpy() + rng.choice([-0.5, 0.0, 0.5], n_rows)
+    synthetic['Rating'] = np.clip(rating, 1.0, 5.0)
+    synthetic['Votes'] = np.rint(synthetic['Votes'].to_numpy() * rng.lognormal(0.0, 0.3, n_rows)).astype(int)
+    # About 500 m of positional noise
+    synthetic['Latitude'] = synthetic['Latitude'] + rng.normal(0.0, 0.005, n_rows)
+    synthetic['Longitude'] = synthetic['Longitude'] + rng.normal(0.0, 0.005, n_rows)
+    return synthetic
+
+
+def scenarios(data: pd.DataFrame) -> Dict[str, dict]:
+    """
+    Query shapes to time, derived from the data so they hit real values.
+    """
+    top = data.groupby(['City', 'Primary Cuisine']).size().idxmax()
+    city, cuisine = str(top[0]).lower(), str(top[1]).lower()
+    # Transpose two letters to force the fuzzy resolver path
+    typo = city[:1] + city[2:3] + city[1:2] + city[3:] if len(city) > 3 else city + 'x'
+    point = data.loc[data['City'].str.lower() == city, ['Latitude', 'Longitude']].median()
+
+    return {
+        'exact_city': {'cuisines': [cuisine], 'budget_range': ('low', 'high'), 'location': city},
+        'fuzzy_city': {'cuisines': [cuisine], 'location': typo},
+        'fallback': {'cuisines': ['no-such-cuisine'], 'budget_range': ('low', 'low'), 'location': city},
+        'no_filter': {},
+        'large_top_n': {'location': city, 'top_n': 1000},
+        'multi_cuisine': {'cuisines': [cuisine, 'chinese', 'italian'], 'w_match': 0.2},
+        'near': {'near': (float(point['Latitude']), float(point['Longitude'])), 'radius_km': 3.0,
+                 'w_distance': 0.2},
+        'numeric_filter': {'cuisines': [cuisine], 'location': city, 'min_rating': 4.0, 'min_votes': 50},
+    }
+
+
+def _summary(seconds: List[float]) -> dict:
+    ms = np.asarray(seconds) * 1000
+    return {
+        'runs': int(ms.size),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'qps': float(1000 / ms.mean()) if ms.mean() > 0 else 0.0,
+    }
+
+
+def _time(func: Callable, runs: int, warmup: int = 0) -> List[float]:
+    for _ in range(warmup):
+        func()
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return seconds
+
+
+def run_benchmarks(
+    data: pd.DataFrame,
+    runs: int = 200,
+    build_runs: int = 3,
+    warmup: int = 10
+) -> dict:
+    """
+    Time construction and every scenario on `data` with the result cache
+    disabled, so each query does its full work.
+    """
+    report = {'rows': len(data)}
+    report['construct'] = _summary(_time(lambda: ZomatoRecommender(data), build_runs))
+
+    recommender = ZomatoRecommender(data)
+    queries = scenarios(data)
+    report['queries'] = {
+        name: _summary(_time(lambda q=query: recommender.recommend(**q), runs, warmup))
+        for name, query in queries.items()
+    }
+
+    # Every scenario in one recommend_batch call, timed per query
+    batch = list(queries.values()) * 10
+    batch_seconds = _time(lambda: recommender.recommend_batch(batch), max(runs // 20, 3), 1)
+    report['batch_per_query'] = _summary([s / len(batch) for s in batch_seconds])
+
+    # "More like this" for the restaurant with the most votes
+    name = str(data.loc[pd.to_numeric(data['Votes'], errors='coerce').idxmax(), 'Restaurant Name'])
+    report['similar_to'] = _summary(_time(lambda: recommender.similar_to(name, 10), runs, warmup))
+
+    # Materialized top-N cells, and the exact-city query answered from them
+    report['precompute'] = _summary(_time(lambda: recommender.precompute(20), build_runs))
+    report['queries']['cells_city'] = _summary(
+        _time(lambda: recommender.recommend(**queries['exact_city']), runs, warmup)
+    )
+    return report
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.10) -> List[str]:
+    """
+    Lines describing p50 regressions beyond `tolerance` between two
+    reports produced by `main`, matched by dataset size and benchmark name.
+    """
+    regressions = []
+    for size, result in current['results'].items():
+        previous = baseline.get('results', {}).get(size)
+        if previous is None:
+            continue
+        extras = ('construct', 'batch_per_query', 'similar_to', 'precompute')
+        named = {**{key: result[key] for key in extras if key in result}, **result['queries']}
+        before = {**{key: previous[key] for key in extras if key in previous}, **previous['queries']}
+        for name, stats in named.items():
+            if name not in before:
+                continue
+            ratio = stats['p50_ms'] / before[name]['p50_ms'] if before[name]['p50_ms'] else 1.0
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{size} {name}: p50 {before[name]['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ms ({ratio:.2f}x)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark recommender latency and throughput.")
+    parser.add_argument('--data', default='data/cleaned_zomato.csv', help="cleaned CSV to scale from")
+    parser.add_argument('--sizes', nargs='+', default=['base', '100000', '1000000'],
+                        help="dataset sizes: 'base' for the CSV itself or a row count")
+    parser.add_argument('--runs', type=int, default=200, help="timed runs per query scenario")
+    parser.add_argument('--build-runs', type=int, default=3, help="timed constructions per size")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here")
+    parser.add_argument('--compare', help="earlier JSON report; exit non-zero on p50 regressions")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed p50 slowdown for --compare")
+    args = parser.parse_args(argv)
+
+    base = pd.read_csv(args.data)
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'seed': args.seed,
+        'results': {},
+    }
+    for size in args.sizes:
+        data = base if size == 'base' else synthesize(base, int(size), args.seed)
+        result = run_benchmarks(data, args.runs, args.build_runs)
+        report['results'][size] = result
+        print(f"{size} ({result['rows']} rows): construct p50 {result['construct']['p50_ms']:.1f} ms, "
+              f"precompute p50 {result['precompute']['p50_ms']:.1f} ms")
+        for name, stats in result['queries'].items():
+            print(f"  {name:<14} p50 {stats['p50_ms']:8.3f}  p95 {stats['p95_ms']:8.3f}  "
+                  f"p99 {stats['p99_ms']:8.3f} ms  {stats['qps']:9.1f} qps")
+        stats = result['batch_per_query']
+        print(f"  {'batch/query':<14} p50 {stats['p50_ms']:8.3f} ms")
+        stats = result['similar_to']
+        print(f"  {'similar_to':<14} p50 {stats['p50_ms']:8.3f}  p95 {stats['p95_ms']:8.3f} ms")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,78 @@
+import time
 import pandas as pd
 import numpy as np
-from typing import Callable, Any
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Any, List, Optional, Tuple
+
+from src.instrumentation import RecommenderStats
+from src.metrics import ranking_metrics, relevance_by_group
+from src.recommender import SharedSnapshot, ZomatoRecommender
+
+
+# What pool workers evaluate against; set once per worker by `_init_worker`
+_worker_target = None
+
+
+def _init_worker(target):
+    global _worker_target
+    if isinstance(target, SharedSnapshot):
+        target = ZomatoRecommender.attach(target)
+    _worker_target = target
+
+
+def _call(func, *args):
+    # Runs in a pool worker: apply `func` to that worker's target
+    return func(_worker_target, *args)
+
+
+def _hit_chunk(
+    recommender: Any,
+    queries: List[dict],
+    cities: np.ndarray,
+    cuisines: np.ndarray
+) -> Tuple[np.ndarray, RecommenderStats]:
+    """
+    Whether each query's results include a restaurant in the target city
+    serving the target primary cuisine, plus the stats gathered meanwhile.
+    """
+    stats = RecommenderStats()
+    previous = getattr(recommender, 'stats', None)
+    if hasattr(recommender, 'stats'):
+        recommender.stats = stats
+    try:
+        if hasattr(recommender, 'rank_batch'):
+            # Only the ranked labels are needed; skip building frames
+            ranked = recommender.rank_batch(queries)
+            found = recommender.data.loc[np.concatenate(ranked), ['City', 'Primary Cuisine']]
+        else:
+            frames = recommender.recommend_batch(queries)
+            ranked = [frame.index for frame in frames]
+            found = pd.concat([frame[['City', 'Primary Cuisine']] for frame in frames])
+    finally:
+        if hasattr(recommender, 'stats'):
+            recommender.stats = previous
+
+    # One row per recommendation, tagged with the query it answers
+    owner = np.repeat(np.arange(len(queries)), [len(r) for r in ranked])
+    same_city = found['City'].astype(str).str.lower().to_numpy() == cities[owner]
+    same_cuisine = found['Primary Cuisine'].astype(str).str.lower().to_numpy() == cuisines[owner]
+    hits = np.bincount(owner[same_city & same_cuisine], minlength=len(queries)) > 0
+    return hits, stats
+
+
+def _rank_chunk(recommender: Any, queries: List[dict]) -> List[np.ndarray]:
+    # Ranked index labels per query, without frames when the recommender allows
+    if hasattr(recommender, 'rank_batch'):
+        return recommender.rank_batch(queries)
+    return [frame.index.to_numpy() for frame in recommender.recommend_batch(queries)]
+
+
+def _answer_chunk(variants: Tuple[Callable, Callable], variant: int, queries: List[dict]) -> Tuple[int, float]:
+    # Run one A/B variant over a chunk; only the count and time travel back
+    start = time.perf_counter()
+    results = variants[variant](queries)
+    return len(results), time.perf_counter() - start
+
 
 class Evaluator:
     def __init__(self):
@@ -8,12 +80,17 @@ class Evaluator:
             'hits': 0,
             'total': 0,
             'satisfaction_scores': [],
-            'usability_feedback': []
+            'usability_feedback': [],
+            'performance': {}
         }
 
-    def qualitative_survey(self, recs: pd.DataFrame) -> float:
+    def qualitative_survey(
+        self,
+        recs: Optional[pd.DataFrame],
+        rng: Optional[np.random.Generator] = None
+    ) -> float:
         # Simulate a realistic Likert score with a bit of variation
-        score = np.random.normal(4.0, 0.3)
+        score = rng.normal(4.0, 0.3) if rng is not None else np.random.normal(4.0, 0.3)
         score = max(1.0, min(5.0, score))  # Clamp to 1–5
         self.metrics['satisfaction_scores'].append(score)
         return score
@@ -21,96 +98,180 @@ class Evaluator:
     def record_usability(self, feedback: str):
         self.metrics['usability_feedback'].append(feedback)
 
+    @staticmethod
+    def _row_queries(rows: pd.DataFrame) -> List[dict]:
+        # One query per row asking for that row's cuisine, budget and city
+        return [
+            {
+                'cuisines': [cuisine],
+                'budget_range': (cost, cost),
+                'location': city,
+                'top_n': 5,
+                'explain': False
+            }
+            for cuisine, cost, city in zip(
+                rows['Primary Cuisine'].to_numpy(),
+                rows['Cost Category'].to_numpy(),
+                rows['City'].to_numpy()
+            )
+        ]
+
+    @staticmethod
+    def _chunks(n: int, chunk_size: int) -> List[slice]:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        return [slice(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+
+    @staticmethod
+    def _map_chunks(func, target, jobs: List[tuple], workers: int) -> list:
+        """
+        `func(target, *job)` for every job, in order. With workers > 1 the
+        jobs run on a process pool; a ZomatoRecommender target is shared
+        with the workers through shared memory, anything else must be
+        picklable (or inherited under the fork start method).
+        """
+        if workers <= 1 or len(jobs) <= 1:
+            return [func(target, *job) for job in jobs]
+
+        shared = target.share() if isinstance(target, ZomatoRecommender) else None
+        try:
+            with ProcessPoolExecutor(
+                min(workers, len(jobs)), initializer=_init_worker, initargs=(shared or target,)
+            ) as pool:
+                futures = [pool.submit(_call, func, *job) for job in jobs]
+                return [future.result() for future in futures]
+        finally:
+            if shared is not None:
+                shared.unlink()
+
     def evaluate_hit_rate(
         self,
         sample: pd.DataFrame,
         recommender: Any,
-        sample_size: int = 100
+        sample_size: Optional[int] = 100,
+        workers: int = 1,
+        chunk_size: int = 2000,
+        seed: int = 42
     ) -> float:
         """
         For each randomly chosen row, ask the recommender to
         re-find something with the same cuisine+budget+city;
         compute fraction where at least one rec matches both city and cuisine.
+        `sample_size=None` evaluates every row. Queries run in chunks of
+        `chunk_size`, across `workers` processes when more than one;
+        the result does not depend on `workers`.
         """
         self.metrics['hits'] = 0
         self.metrics['total'] = 0
 
-        for idx in sample.sample(sample_size, random_state=42).index:
-            orig = sample.loc[idx]
-            recs = recommender.recommend(
-                cuisines=[orig['Primary Cuisine']],
-                budget_range=(orig['Cost Category'], orig['Cost Category']),
-                location=orig['City'],
-                top_n=5
-            )
-            self.metrics['total'] += 1
+        picked = sample if sample_size is None else sample.sample(sample_size, random_state=seed)
+        queries = self._row_queries(picked)
+        cities = picked['City'].astype(str).str.lower().str.strip().to_numpy()
+        cuisines = picked['Primary Cuisine'].astype(str).str.lower().str.strip().to_numpy()
 
-            match = (
-                (recs['Primary Cuisine'] == orig['Primary Cuisine']) &
-                (recs['City'] == orig['City'])
-            ).any()
+        jobs = [(queries[part], cities[part], cuisines[part]) for part in self._chunks(len(queries), chunk_size)]
+        start = time.perf_counter()
+        outcomes = self._map_chunks(_hit_chunk, recommender, jobs, workers)
+        elapsed = time.perf_counter() - start
 
-            if match:
-                self.metrics['hits'] += 1
+        stats = RecommenderStats()
+        for hits, chunk_stats in outcomes:
+            self.metrics['hits'] += int(hits.sum())
+            self.metrics['total'] += len(hits)
+            stats.merge(chunk_stats)
 
+        self.metrics['performance']['hit_rate'] = {
+            'queries': len(queries),
+            'workers': workers,
+            'seconds': elapsed,
+            'ms_per_query': elapsed * 1000 / max(1, len(queries)),
+            'stages': stats.summary(),
+        }
         return self.metrics['hits'] / max(1, self.metrics['total'])
 
+    def evaluate_ranking(
+        self,
+        data: pd.DataFrame,
+        recommender: Any,
+        k: int = 10,
+        min_rating: float = 4.0,
+        workers: int = 1,
+        chunk_size: int = 2000
+    ) -> dict:
+        """
+        Ask for the top k of every (city, cuisine) group in `data` and score
+        the rankings against that group's restaurants rated `min_rating`
+        or more: precision@k, recall@k, NDCG@k, MRR, coverage and
+        popularity bias (by votes). Stored under metrics['ranking'].
+        """
+        queries, relevant = relevance_by_group(data, min_rating=min_rating, top_n=k)
+        jobs = [(queries[part],) for part in self._chunks(len(queries), chunk_size)]
+        ranked = [r for chunk in self._map_chunks(_rank_chunk, recommender, jobs, workers) for r in chunk]
+
+        catalog = recommender.data.index
+        popularity = pd.to_numeric(recommender.data['Votes'], errors='coerce').to_numpy(dtype=np.float64)
+        self.metrics['ranking'] = ranking_metrics(ranked, relevant, catalog, k, popularity)
+        return self.metrics['ranking']
+
     def run_ab_test(
         self,
         data: pd.DataFrame,
-        rec_a: Callable[..., pd.DataFrame],
-        rec_b: Callable[..., pd.DataFrame],
-        cohort_split: float = 0.5
+        rec_a: Callable[[List[dict]], List[pd.DataFrame]],
+        rec_b: Callable[[List[dict]], List[pd.DataFrame]],
+        cohort_split: float = 0.5,
+        cohort_size: Optional[int] = None,
+        workers: int = 1,
+        chunk_size: int = 2000,
+        seed: int = 0
     ) -> dict:
         """
         Simulate an A/B test by randomly splitting the data
         and collecting average satisfaction for each recommender.
-        Also records simulated usability feedback.
+        Also records simulated usability feedback and each variant's
+        latency under metrics['performance']['ab_test'].
+        `rec_a`/`rec_b` take a list of query dicts and return one
+        result frame per query, like `ZomatoRecommender.recommend_batch`.
+        Each cohort is evaluated in full unless `cohort_size` caps it,
+        in chunks across `workers` processes. Survey scores are drawn
+        from one generator per chunk seeded by (seed, cohort, chunk),
+        so results are identical however many workers run.
         """
         n = len(data)
-        idxs = data.sample(frac=1, random_state=0).index.to_list()
+        idxs = data.sample(frac=1, random_state=seed).index.to_list()
         split = int(cohort_split * n)
-        cohort1 = data.loc[idxs[:split]]
-        cohort2 = data.loc[idxs[split:]]
-
-        scores1 = []
-        for _, row in cohort1.head(50).iterrows():
-            recs = rec_a(
-                cuisines=[row['Primary Cuisine']],
-                budget_range=(row['Cost Category'], row['Cost Category']),
-                location=row['City'],
-                top_n=5
-            )
-            score = self.qualitative_survey(recs)
-            scores1.append(score)
-            # Simulated usability feedback
-            if score > 4.5:
-                self.record_usability("Cohort A: Excellent suggestions!")
-            elif score < 3.5:
-                self.record_usability("Cohort A: Recommendations need improvement.")
-            else:
-                self.record_usability("Cohort A: Fair but could be better.")
-
-        scores2 = []
-        for _, row in cohort2.head(50).iterrows():
-            recs = rec_b(
-                cuisines=[row['Primary Cuisine']],
-                budget_range=(row['Cost Category'], row['Cost Category']),
-                location=row['City'],
-                top_n=5
-            )
-            score = self.qualitative_survey(recs)
-            scores2.append(score)
-            # Simulated usability feedback
-            if score > 4.5:
-                self.record_usability("Cohort B: Excellent suggestions!")
-            elif score < 3.5:
-                self.record_usability("Cohort B: Recommendations need improvement.")
-            else:
-                self.record_usability("Cohort B: Fair but could be better.")
-
-        sat1 = np.mean(scores1)
-        sat2 = np.mean(scores2)
+        cohorts = [data.loc[idxs[:split]], data.loc[idxs[split:]]]
+
+        jobs = []
+        for variant, cohort in enumerate(cohorts):
+            queries = self._row_queries(cohort if cohort_size is None else cohort.head(cohort_size))
+            jobs.extend((variant, queries[part]) for part in self._chunks(len(queries), chunk_size))
+        outcomes = self._map_chunks(_answer_chunk, (rec_a, rec_b), jobs, workers)
+
+        scores = [[], []]
+        seconds = [0.0, 0.0]
+        chunk_no = [0, 0]
+        for (variant, _), (answered, spent) in zip(jobs, outcomes):
+            rng = np.random.default_rng([seed, variant, chunk_no[variant]])
+            chunk_no[variant] += 1
+            seconds[variant] += spent
+            label = 'AB'[variant]
+            for _ in range(answered):
+                score = self.qualitative_survey(None, rng)
+                scores[variant].append(score)
+                # Simulated usability feedback
+                if score > 4.5:
+                    self.record_usability(f"Cohort {label}: Excellent suggestions!")
+                elif score < 3.5:
+                    self.record_usability(f"Cohort {label}: Recommendations need improvement.")
+                else:
+                    self.record_usability(f"Cohort {label}: Fair but could be better.")
+
+        sat1 = np.mean(scores[0])
+        sat2 = np.mean(scores[1])
+        self.metrics['performance']['ab_test'] = {
+            'cohort1_ms_per_query': seconds[0] * 1000 / max(1, len(scores[0])),
+            'cohort2_ms_per_query': seconds[1] * 1000 / max(1, len(scores[1])),
+        }
 
         return {
             'cohort1_satisfaction': float(sat1),
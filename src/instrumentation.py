@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List
+
+
+def _edges(low: float, high: float) -> List[float]:
+    # 1-2-5 series of bucket upper bounds from `low` to `high`
+    edges = []
+    decade = low
+    while decade <= high:
+        edges.extend(decade * step for step in (1, 2, 5))
+        decade *= 10
+    return [edge for edge in edges if edge <= high]
+
+
+class _Histogram:
+    """
+    Fixed-bucket histogram with exact count, total and max.
+    """
+
+    def __init__(self, edges: List[float]):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def merge(self, other: '_Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def add(self, value: float):
+        self.counts[bisect_left(self.edges, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        # Upper bound of the bucket holding the q-th value (max for the overflow bucket)
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= target:
+                return min(self.edges[i], self.max) if i < len(self.edges) else self.max
+        return 0.0
+
+    def summary(self, scale: float = 1.0, buckets: bool = False) -> dict:
+        summary = {
+            'count': self.count,
+            'total': self.total * scale,
+            'mean': self.total / self.count * scale if self.count else 0.0,
+            'p50': self.quantile(0.50) * scale,
+            'p95': self.quantile(0.95) * scale,
+            'p99': self.quantile(0.99) * scale,
+            'max': self.max * scale,
+        }
+        if buckets:
+            bounds = [f'<={edge * scale:g}' for edge in self.edges] + [f'>{self.edges[-1] * scale:g}']
+            summary['buckets'] = {b: n for b, n in zip(bounds, self.counts) if n}
+        return summary
+
+
+class RecommenderStats:
+    """
+    Aggregates what `ZomatoRecommender` reports while instrumented:
+    per-stage durations, rows surviving each filter, the fallback level
+    taken and result-cache hits. Safe to share between threads, and
+    picklable so worker processes can send theirs back to be merged.
+    Enable with `recommender.stats = RecommenderStats()`.
+    """
+
+    DURATION_EDGES = _edges(1e-6, 10.0)
+    ROW_EDGES = _edges(1, 10_000_000)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stages: Dict[str, _Histogram] = {}
+            self._rows: Dict[str, _Histogram] = {}
+            self._fallbacks: Dict[str, int] = {}
+            self._cache = {'hits': 0, 'misses': 0}
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def merge(self, other: 'RecommenderStats'):
+        """
+        Fold another collector's counts into this one.
+        """
+        with self._lock:
+            for mine, theirs, edges in (
+                (self._stages, other._stages, self.DURATION_EDGES),
+                (self._rows, other._rows, self.ROW_EDGES),
+            ):
+                for name, histogram in theirs.items():
+                    mine.setdefault(name, _Histogram(edges)).merge(histogram)
+            for relaxed, n in other._fallbacks.items():
+                self._fallbacks[relaxed] = self._fallbacks.get(relaxed, 0) + n
+            for key, n in other._cache.items():
+                self._cache[key] += n
+
+    @staticmethod
+    def clock() -> float:
+        return time.perf_counter()
+
+    def lap(self, stage: str, start: float) -> float:
+        """
+        Record the time since `start` under `stage` and return the current
+        clock, so consecutive stages chain: `t = stats.lap('filter', t)`.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = _Histogram(self.DURATION_EDGES)
+            histogram.add(now - start)
+        return now
+
+    def rows(self, stage: str, count: int):
+        with self._lock:
+            histogram = self._rows.get(stage)
+            if histogram is None:
+                histogram = self._rows[stage] = _Histogram(self.ROW_EDGES)
+            histogram.add(count)
+
+    def fallback(self, relaxed: str):
+        with self._lock:
+            self._fallbacks[relaxed] = self._fallbacks.get(relaxed, 0) + 1
+
+    def cache(self, hit: bool):
+        with self._lock:
+            self._cache['hits' if hit else 'misses'] += 1
+
+    def summary(self, histograms: bool = False) -> dict:
+        """
+        JSON-ready aggregate: stage timings in milliseconds, row counts,
+        fallback levels and cache hits. `histograms=True` adds the
+        non-empty buckets of every histogram.
+        """
+        with self._lock:
+            return {
+                'stages_ms': {
+                    name: h.summary(1000.0, histograms) for name, h in self._stages.items()
+                },
+                'rows': {name: h.summary(1.0, histograms) for name, h in self._rows.items()},
+                'fallbacks': dict(self._fallbacks),
+                'cache': dict(self._cache),
+            }
+
+    def report(self) -> str:
+        """
+        Plain-text table of the summary, one line per stage and filter.
+        """
+        summary = self.summary()
+        lines = [f"{'stage':<16}{'count':>8}{'mean ms':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'total ms':>11}"]
+        for name, s in summary['stages_ms'].items():
+            lines.append(
+                f"{name:<16}{s['count']:>8}{s['mean']:>10.3f}{s['p50']:>10.3f}"
+                f"{s['p95']:>10.3f}{s['p99']:>10.3f}{s['total']:>11.1f}"
+            )
+        lines.append(f"{'rows':<16}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+        for name, s in summary['rows'].items():
+            lines.append(
+                f"{name:<16}{s['count']:>8}{s['mean']:>10.0f}{s['p50']:>10.0f}{s['p95']:>10.0f}{s['p99']:>10.0f}"
+            )
+        lines.append(f"fallbacks: {summary['fallbacks']}")
+        lines.append(f"cache: {summary['cache']}")
+        return '\n'.join(lines)
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def sample_queries(
+    data: pd.DataFrame,
+    n: int,
+    distinct: Optional[int] = None,
+    seed: int = 0
+) -> List[dict]:
+    """
+    `n` recommend queries drawn from real (city, cuisine, cost) rows. With
+    `distinct`, only that many different queries are repeated, which
+    exercises request coalescing and the result cache.
+    """
+    rng = random.Random(seed)
+    rows = data[['City', 'Primary Cuisine', 'Cost Category']].dropna().to_dict('records')
+    pool = []
+    for _ in range(distinct or n):
+        row = rng.choice(rows)
+        query = {'location': row['City'], 'top_n': rng.choice([3, 5, 10])}
+        if rng.random() < 0.8:
+            query['cuisines'] = [row['Primary Cuisine']]
+        if rng.random() < 0.5:
+            query['budget_range'] = ['low', row['Cost Category']]
+        pool.append(query)
+    return [pool[i % len(pool)] for i in range(n)]
+
+
+async def _request(reader, writer, host: str, path: str, payload: dict) -> int:
+    body = json.dumps(payload).encode('utf-8')
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode('latin1') + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def run_load(
+    host: str,
+    port: int,
+    queries: List[dict],
+    concurrency: int = 16,
+    path: str = '/recommend'
+) -> dict:
+    """
+    Send `queries` over `concurrency` keep-alive connections and report
+    throughput, latency percentiles (ms) and non-200 responses.
+    """
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for query in queries:
+        queue.put_nowait(query)
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while not queue.empty():
+                query = queue.get_nowait()
+                start = time.perf_counter()
+                status = await _request(reader, writer, host, path, query)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrency, len(queries)))))
+    elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': elapsed,
+        'qps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': float(np.percentile(ms, 50)) if ms.size else 0.0,
+        'p95_ms': float(np.percentile(ms, 95)) if ms.size else 0.0,
+        'p99_ms': float(np.percentile(ms, 99)) if ms.size else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running recommendation server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--data', default='data/cleaned_zomato.csv', help="CSV to draw queries from")
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--distinct', type=int, help="number of distinct queries to cycle through")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    queries = sample_queries(pd.read_csv(args.data), args.requests, args.distinct, args.seed)
+    report = asyncio.run(run_load(args.host, args.port, queries, args.concurrency))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+def _catalog_codes(labels: Sequence[np.ndarray], catalog: pd.Index) -> List[np.ndarray]:
+    # Map item labels onto catalog positions (-1 for unknown labels)
+    flat = np.concatenate(labels) if len(labels) else np.empty(0)
+    codes = catalog.get_indexer(flat) if flat.size else np.empty(0, dtype=np.intp)
+    return np.split(codes, np.cumsum([len(item) for item in labels])[:-1])
+
+
+def pad_rankings(ranked: Sequence[np.ndarray], catalog: pd.Index, k: int) -> np.ndarray:
+    """
+    Stack per-query ranked item labels into an (n_queries, k) matrix of
+    catalog positions, truncated to k and padded with -1.
+    """
+    lengths = np.minimum([len(r) for r in ranked], k)
+    matrix = np.full((len(ranked), k), -1, dtype=np.int64)
+    if not len(ranked):
+        return matrix
+    codes = np.concatenate([c[:k] for c in _catalog_codes(ranked, catalog)])
+    rows = np.repeat(np.arange(len(ranked)), lengths)
+    cols = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    matrix[rows, cols] = codes
+    return matrix
+
+
+def hit_matrix(
+    ranked: np.ndarray,
+    relevant: Sequence[np.ndarray],
+    catalog: pd.Index
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Boolean (n_queries, k) matrix marking relevant recommendations, and
+    the number of relevant items per query. `ranked` comes from
+    `pad_rankings`; `relevant` holds each query's relevant item labels.
+    """
+    n_items = len(catalog)
+    relevant_codes = _catalog_codes(relevant, catalog)
+    n_relevant = np.array([np.unique(c[c >= 0]).size for c in relevant_codes], dtype=np.int64)
+
+    # (query, item) pairs as single integer keys, matched in one isin
+    owner = np.repeat(np.arange(len(relevant)), [len(c) for c in relevant_codes])
+    flat = np.concatenate(relevant_codes) if len(relevant_codes) else np.empty(0, dtype=np.int64)
+    relevant_keys = owner[flat >= 0] * n_items + flat[flat >= 0]
+    ranked_keys = np.arange(len(ranked))[:, None] * n_items + ranked
+    hits = np.isin(ranked_keys, relevant_keys) & (ranked >= 0)
+    return hits, n_relevant
+
+
+def ranking_metrics(
+    ranked: Sequence[np.ndarray],
+    relevant: Sequence[np.ndarray],
+    catalog: pd.Index,
+    k: int = 10,
+    popularity: Optional[np.ndarray] = None
+) -> Dict[str, float]:
+    """
+    Precision@k, recall@k, NDCG@k (binary gains), MRR, catalog coverage
+    and popularity bias for many queries at once.
+
+    `ranked` and `relevant` hold item labels per query (e.g. from
+    `ZomatoRecommender.rank_batch` and `relevance_by_group`); `catalog`
+    indexes every recommendable item and `popularity` (aligned with it,
+    e.g. votes) enables the popularity measures. Recall, NDCG and MRR
+    average over queries with at least one relevant item.
+    """
+    if len(ranked) != len(relevant):
+        raise ValueError("ranked and relevant must have one entry per query")
+    if k < 1:
+        raise ValueError("k must be at least 1")
+
+    matrix = pad_rankings(ranked, catalog, k)
+    hits, n_relevant = hit_matrix(matrix, relevant, catalog)
+    judged = n_relevant > 0
+    n_hits = hits.sum(axis=1)
+
+    # Discounted gains, and the ideal DCG from the first min(n_relevant, k) slots
+    discounts = 1.0 / np.log2(np.arange(k) + 2.0)
+    dcg = hits @ discounts
+    ideal = np.concatenate([[0.0], np.cumsum(discounts)])[np.minimum(n_relevant, k)]
+
+    first_hit = np.where(hits.any(axis=1), hits.argmax(axis=1) + 1, 0)
+    reciprocal_rank = np.divide(1.0, first_hit, out=np.zeros(len(first_hit)), where=first_hit > 0)
+
+    recommended = matrix[matrix >= 0]
+    metrics = {
+        'queries': int(len(matrix)),
+        'judged_queries': int(judged.sum()),
+        f'precision@{k}': float((n_hits / k).mean()) if len(matrix) else 0.0,
+        f'recall@{k}': float((n_hits[judged] / n_relevant[judged]).mean()) if judged.any() else 0.0,
+        f'ndcg@{k}': float((dcg[judged] / ideal[judged]).mean()) if judged.any() else 0.0,
+        'mrr': float(reciprocal_rank[judged].mean()) if judged.any() else 0.0,
+        'coverage': float(np.unique(recommended).size / len(catalog)) if len(catalog) else 0.0,
+    }
+
+    if popularity is not None:
+        popularity = np.asarray(popularity, dtype=np.float64)
+        if len(popularity) != len(catalog):
+            raise ValueError("popularity must align with catalog")
+        # > 1 means recommendations lean towards popular items
+        mean_catalog = np.nanmean(popularity)
+        mean_recommended = np.nanmean(popularity[recommended]) if recommended.size else np.nan
+        metrics['popularity_bias'] = float(mean_recommended / mean_catalog) if mean_catalog else np.nan
+        # Gini of how often each catalog item is recommended (0 = evenly spread)
+        counts = np.sort(np.bincount(recommended, minlength=len(catalog)))
+        total = counts.sum()
+        if total:
+            cumulative = np.cumsum(counts)
+            metrics['gini'] = float(1 - 2 * (cumulative / total).sum() / len(counts) + 1 / len(counts))
+        else:
+            metrics['gini'] = 0.0
+    return metrics
+
+
+def relevance_by_group(
+    data: pd.DataFrame,
+    keys: Sequence[str] = ('City', 'Primary Cuisine'),
+    min_rating: float = 4.0,
+    top_n: int = 10
+) -> Tuple[List[dict], List[np.ndarray]]:
+    """
+    One recommend query per (city, cuisine) group, labelled with the
+    index labels of that group's restaurants rated at least `min_rating`.
+    """
+    keys = list(keys)
+    frame = data[keys + ['Rating']].copy()
+    for key in keys:
+        frame[key] = frame[key].astype(str).str.lower().str.strip()
+
+    groups = frame.groupby(keys, sort=True, observed=True)
+    good = frame['Rating'].to_numpy() >= min_rating
+    relevant = []
+    queries = []
+    for values, positions in groups.indices.items():
+        values = dict(zip(keys, values if isinstance(values, tuple) else (values,)))
+        query = {'top_n': top_n, 'explain': False}
+        if 'City' in values:
+            query['location'] = values['City']
+        if 'Primary Cuisine' in values:
+            query['cuisines'] = [values['Primary Cuisine']]
+        if 'Cost Category' in values:
+            query['budget_range'] = (values['Cost Category'], values['Cost Category'])
+        queries.append(query)
+        relevant.append(data.index[positions[good[positions]]].to_numpy())
+    return queries, relevant
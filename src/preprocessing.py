@@ -0,0 +1,122 @@
+import argparse
+import numpy as np
+import pandas as pd
+from typing import Iterator, Optional, Set
+
+
+# Columns the recommender never uses; they are not even parsed
+IRRELEVANT_COLUMNS = [
+    'Restaurant ID', 'Address', 'Locality Verbose', 'Switch to order menu',
+    'Country Code', 'Currency', 'Has Table booking', 'Has Online delivery',
+    'Is delivering now', 'Menu Item', 'Rating text', 'Rating color', 'Locality',
+    'Phone Numbers', 'Reservation'
+]
+
+ESSENTIAL_COLUMNS = ['Restaurant Name', 'Cuisines', 'City', 'Aggregate rating']
+
+CUISINE_FIXES = {
+    'chinese': 'chinese', 'chinees': 'chinese',
+    'south indian': 'south indian', 'south-indian': 'south indian'
+}
+
+OUTPUT_COLUMNS = [
+    'Restaurant Name', 'City', 'Primary Cuisine', 'Cuisines', 'Cost Category',
+    'Rating', 'Votes', 'Latitude', 'Longitude'
+]
+
+
+def clean_chunk(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the cleaning steps from notebooks/preprocessing.ipynb to one
+    chunk of the raw export, using only column-wise operations.
+    """
+    data = data.drop(columns=IRRELEVANT_COLUMNS, errors='ignore')
+
+    # Handle missing values
+    data = data.dropna(subset=ESSENTIAL_COLUMNS)
+    data['Votes'] = pd.to_numeric(data['Votes'], errors='coerce').fillna(0).astype(int)
+    data['Latitude'] = pd.to_numeric(data['Latitude'], errors='coerce')
+    data['Longitude'] = pd.to_numeric(data['Longitude'], errors='coerce')
+    data = data.dropna(subset=['Latitude', 'Longitude'])
+    if data.empty:
+        return pd.DataFrame(columns=OUTPUT_COLUMNS)
+
+    # Normalize categorical values
+    data['Cuisines'] = data['Cuisines'].str.lower().str.strip().replace(CUISINE_FIXES)
+    data['City'] = data['City'].str.lower().str.strip()
+
+    # Convert price and rating to numbers
+    price = pd.to_numeric(data['Price range'], errors='coerce')
+    rating = pd.to_numeric(data['Aggregate rating'], errors='coerce').fillna(0)
+
+    # Feature engineering
+    data['Cost Category'] = np.select([price == 1, price == 2], ['low', 'medium'], default='high')
+    data['Primary Cuisine'] = data['Cuisines'].str.split(',', n=1, expand=True)[0].str.strip()
+    # Keep every listed cuisine as a clean comma-separated list
+    data['Cuisines'] = data['Cuisines'].str.replace(r'\s*,\s*', ', ', regex=True)
+    # Round ratings to the nearest 0.5 step
+    data['Rating'] = (rating.clip(lower=1.0, upper=5.0) * 2).round() / 2
+
+    return data[OUTPUT_COLUMNS]
+
+
+def _deduplicated(chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    # Drop rows already seen in this or an earlier chunk, comparing row hashes
+    seen: Set[int] = set()
+    for chunk in chunks:
+        hashes = pd.util.hash_pandas_object(chunk, index=False).to_numpy()
+        fresh = np.fromiter((h not in seen for h in hashes), dtype=bool, count=len(hashes))
+        fresh &= ~pd.Series(hashes).duplicated().to_numpy()
+        seen.update(hashes[fresh].tolist())
+        yield chunk[fresh]
+
+
+def preprocess(
+    input_path: str = 'data/zomato.csv',
+    output_path: str = 'data/cleaned_zomato.csv',
+    chunksize: Optional[int] = 100_000,
+    encoding: str = 'latin1'
+) -> int:
+    """
+    Stream the raw export through `clean_chunk` in chunks of `chunksize`
+    rows and write the cleaned CSV. Returns the number of rows written.
+    """
+    reader = pd.read_csv(
+        input_path,
+        encoding=encoding,
+        usecols=lambda col: col not in IRRELEVANT_COLUMNS,
+        chunksize=chunksize
+    )
+    if not chunksize:
+        reader = iter([reader])
+
+    written = 0
+    for chunk in _deduplicated(reader):
+        cleaned = clean_chunk(chunk)
+        cleaned.to_csv(
+            output_path,
+            mode='w' if written == 0 else 'a',
+            header=written == 0,
+            index=False
+        )
+        written += len(cleaned)
+
+    if written == 0:
+        pd.DataFrame(columns=OUTPUT_COLUMNS).to_csv(output_path, index=False)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Clean the raw Zomato export for the recommender.")
+    parser.add_argument('input', nargs='?', default='data/zomato.csv', help="raw Zomato CSV")
+    parser.add_argument('output', nargs='?', default='data/cleaned_zomato.csv', help="cleaned CSV to write")
+    parser.add_argument('--chunksize', type=int, default=100_000, help="rows per chunk (0 reads everything at once)")
+    parser.add_argument('--encoding', default='latin1', help="encoding of the raw CSV")
+    args = parser.parse_args(argv)
+
+    rows = preprocess(args.input, args.output, args.chunksize or None, args.encoding)
+    print(f"Wrote {rows} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
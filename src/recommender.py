@@ -1,159 +1,2170 @@
 import pandas as pd
 import numpy as np
+import heapq
+import json
+import os
 import re
+import threading
+from contextlib import contextmanager
 from difflib import get_close_matches
-from typing import List, Optional, Tuple
+from functools import lru_cache, wraps
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from scipy import sparse
+
+from src.caching import ResultCache
+from src.instrumentation import RecommenderStats
+from src.scoring import Scoring
+
+
+def _encode_strings(values) -> Tuple[np.ndarray, np.ndarray]:
+    # Strings as one UTF-8 byte buffer plus offsets, so loading needs no pickle
+    encoded = [str(v).encode('utf-8') for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def _decode_strings(offsets: np.ndarray, buffer: np.ndarray) -> List[str]:
+    buffer = buffer.tobytes()
+    return [buffer[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+
+class _CityResolver:
+    """
+    Maps free-text locations onto a fixed city vocabulary: exact match,
+    then fuzzy match, then substring match. Fuzzy candidates are pruned
+    with a character-count index before difflib runs, and every
+    resolution is memoized per input string.
+    """
+
+    def __init__(self, cities: List[str], cutoff: float = 0.5, memo_size: int = 4096):
+        self._cities = np.array(cities, dtype=object)
+        self._known = set(cities)
+        self._cutoff = cutoff
+
+        # Per-city character counts: the character overlap bounds difflib's
+        # similarity ratio from above, so pruning on it never drops a match
+        self._char_pos = {ch: i for i, ch in enumerate(sorted({ch for city in cities for ch in city}))}
+        self._char_counts = np.zeros((len(cities), len(self._char_pos)), dtype=np.int16)
+        for row, city in enumerate(cities):
+            for ch in city:
+                self._char_counts[row, self._char_pos[ch]] += 1
+        self._lengths = np.array([len(city) for city in cities])
+
+        self.resolve = lru_cache(maxsize=memo_size)(self._resolve)
+
+    def _candidates(self, loc: str) -> List[str]:
+        counts = np.zeros(len(self._char_pos), dtype=np.int16)
+        for ch in loc:
+            if ch in self._char_pos:
+                counts[self._char_pos[ch]] += 1
+        overlap = np.minimum(self._char_counts, counts).sum(axis=1)
+        bound = 2.0 * overlap / np.maximum(self._lengths + len(loc), 1)
+        return list(self._cities[bound >= self._cutoff])
+
+    def _resolve(self, loc: str) -> Tuple[str, ...]:
+        # First try exact match
+        if loc in self._known:
+            return (loc,)
+        # Then try fuzzy match
+        matched = get_close_matches(loc, self._candidates(loc), n=3, cutoff=self._cutoff)
+        if not matched:
+            # Finally try substring match
+            matched = [city for city in self._cities if loc in city]
+        return tuple(matched)
+
+
+class _SortedColumn:
+    """
+    Row positions ordered by one numeric column, with the sorted values
+    alongside, so the rows inside a value range are two binary searches
+    away. NaN (missing values and removed rows) sorts last and falls
+    outside every range.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.order = np.argsort(values, kind='stable')
+        self.values = values[self.order]
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {'order': self.order, 'values': self.values}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> '_SortedColumn':
+        column = cls.__new__(cls)
+        column.order = state['order']
+        column.values = state['values']
+        return column
+
+    def span(self, low: float, high: float) -> Tuple[int, int]:
+        # Bounds into `order` of the rows with low <= value <= high
+        return (
+            int(np.searchsorted(self.values, low, side='left')),
+            int(np.searchsorted(self.values, high, side='right'))
+        )
+
+    def rows(self, start: int, end: int) -> np.ndarray:
+        # The rows of a span, as sorted row positions
+        return np.sort(self.order[start:end])
+
+    def update(self, values: np.ndarray, rows: np.ndarray):
+        """
+        Re-slot `rows` after their values changed (or they were appended)
+        in `values`.
+        """
+        stale = np.zeros(len(values), dtype=bool)
+        stale[rows] = True
+        keep = ~stale[self.order]
+        order, sorted_values = self.order[keep], self.values[keep]
+        moved = rows[np.argsort(values[rows], kind='stable')]
+        slots = np.searchsorted(sorted_values, values[moved], side='right')
+        self.order = np.insert(order, slots, moved)
+        self.values = np.insert(sorted_values, slots, values[moved])
+
+
+class _TopCells:
+    """
+    Materialized rankings: the best `depth` rows of every populated cell,
+    stored as global ranks (positions in one total order of all live
+    rows) so cells merge by comparing plain integers. Cell lists sit back
+    to back in `ranks`, found by binary search on the sorted cell keys.
+    """
+
+    def __init__(
+        self,
+        keys: np.ndarray,
+        ranks: np.ndarray,
+        ranked: np.ndarray,
+        depth: int,
+        weights: Tuple[float, float]
+    ):
+        # `keys` and `ranks` are the (cell key, global rank) pairs of every
+        # row in every cell it belongs to, ranked under (w_rating, w_votes) `weights`
+        order = np.lexsort((ranks, keys))
+        keys, ranks = keys[order], ranks[order]
+        first = np.ones(keys.size, dtype=bool)
+        first[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(first)
+        sizes = np.diff(np.append(starts, keys.size))
+        # Keep the first `depth` pairs of each cell
+        position = np.arange(keys.size) - np.repeat(starts, sizes)
+        kept = np.minimum(sizes, depth)
+        self.depth = depth
+        self.weights = weights
+        self.ranked = ranked
+        self.keys = keys[starts]
+        self.ranks = ranks[position < depth]
+        self.ends = np.cumsum(kept)
+        self.starts = self.ends - kept
+        # Cells holding more rows than they keep
+        self.truncated = sizes > depth
+
+    def cells(self, keys: np.ndarray) -> np.ndarray:
+        # Positions of the populated cells among `keys`
+        if self.keys.size == 0:
+            return np.empty(0, dtype=np.intp)
+        pos = np.searchsorted(self.keys, keys)
+        pos = pos[(pos < self.keys.size) & (self.keys[np.minimum(pos, self.keys.size - 1)] == keys)]
+        return np.unique(pos)
+
+    def top(
+        self,
+        keys: np.ndarray,
+        top_n: int,
+        accept: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Rows of the best `top_n` across the cells at `keys`, best first,
+        by a k-way heap merge; a row in several cells counts once.
+        `accept` maps rows to a mask of those that may be returned. None
+        when a truncated cell runs out before `top_n` rows are found,
+        since rows it did not keep could rank next.
+        """
+        cells = self.cells(keys)
+        lists = [self.ranks[self.starts[i]:self.ends[i]] for i in cells]
+        # Past a truncated cell's last kept rank the merge is no longer exact
+        bound = min((int(ranks[-1]) for i, ranks in zip(cells, lists) if self.truncated[i]), default=None)
+        if accept is not None:
+            lists = [ranks[accept(self.ranked[ranks])] for ranks in lists]
+
+        merged: List[int] = []
+        for rank in heapq.merge(*(ranks.tolist() for ranks in lists)):
+            if bound is not None and rank > bound:
+                return None
+            if merged and merged[-1] == rank:
+                continue
+            merged.append(rank)
+            if len(merged) == top_n:
+                break
+        if len(merged) < top_n and bound is not None:
+            return None
+        return self.ranked[np.asarray(merged, dtype=np.intp)]
+
+
+class _GeoGrid:
+    """
+    Uniform latitude/longitude grid over restaurant coordinates. Rows are
+    bucketed by cell once; a radius query only visits the cells covering
+    the circle's bounding box and computes exact haversine distances for
+    the rows in them. Rows added or moved later sit in a small unbucketed
+    list that every query also checks, until it is large enough to rebucket.
+    """
+
+    EARTH_RADIUS_KM = 6371.0088
+    MAX_EXTRA = 4096
+
+    def __init__(self, latitude: np.ndarray, longitude: np.ndarray, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._n_lon = int(np.ceil(360.0 / cell_deg))
+        self._bucket(latitude, longitude)
+
+    def _bucket(self, latitude: np.ndarray, longitude: np.ndarray):
+        self._lat = latitude
+        self._lon = longitude
+        # Rows without usable coordinates are left out of every cell
+        valid = np.flatnonzero(np.isfinite(latitude) & np.isfinite(longitude))
+        keys = self._cell_keys(latitude[valid], longitude[valid])
+        order = np.argsort(keys, kind='stable')
+        self._rows = valid[order]
+        self._keys, self._starts = np.unique(keys[order], return_index=True)
+        self._ends = np.append(self._starts[1:], len(self._rows))
+        self._extra = np.empty(0, dtype=np.intp)
+
+    def update(self, latitude: np.ndarray, longitude: np.ndarray, rows: np.ndarray):
+        """
+        Point the grid at new coordinate arrays in which `rows` were added
+        or moved. Stale bucket entries are harmless because distances are
+        always computed from the current coordinates.
+        """
+        extra = np.union1d(self._extra, rows)
+        if len(extra) > max(self.MAX_EXTRA, len(self._rows) // 20):
+            self._bucket(latitude, longitude)
+            return
+        self._lat = latitude
+        self._lon = longitude
+        self._extra = extra
+
+    def state(self) -> Dict[str, np.ndarray]:
+        # Bucket arrays needed to rebuild the grid without re-sorting
+        return {'rows': self._rows, 'keys': self._keys, 'starts': self._starts, 'extra': self._extra}
+
+    @classmethod
+    def from_state(
+        cls,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        cell_deg: float,
+        state: Dict[str, np.ndarray]
+    ) -> '_GeoGrid':
+        grid = cls.__new__(cls)
+        grid.cell_deg = cell_deg
+        grid._lat = latitude
+        grid._lon = longitude
+        grid._n_lon = int(np.ceil(360.0 / cell_deg))
+        grid._rows = state['rows']
+        grid._keys = state['keys']
+        grid._starts = state['starts']
+        grid._ends = np.append(grid._starts[1:], len(grid._rows))
+        grid._extra = state['extra']
+        return grid
+
+    def _cell_keys(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        iy = np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / self.cell_deg).astype(np.int64)
+        ix = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / self.cell_deg).astype(np.int64) % self._n_lon
+        return iy * self._n_lon + ix
+
+    def distances(self, rows: np.ndarray, lat: float, lon: float) -> np.ndarray:
+        # Great-circle distance in km from (lat, lon) to each row
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lat2 = np.radians(self._lat[rows].astype(np.float64))
+        lon2 = np.radians(self._lon[rows].astype(np.float64))
+        a = (np.sin((lat2 - lat1) / 2) ** 2
+             + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+        return 2 * self.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def within(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sorted row positions within `radius_km` of (lat, lon), with their
+        distances in km.
+        """
+        dlat = np.degrees(radius_km / self.EARTH_RADIUS_KM)
+        coslat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if coslat < 1e-9 else min(np.degrees(radius_km / (self.EARTH_RADIUS_KM * coslat)), 180.0)
+
+        y0 = int(np.floor((max(lat - dlat, -90.0) + 90.0) / self.cell_deg))
+        y1 = int(np.floor((min(lat + dlat, 90.0) + 90.0) / self.cell_deg))
+        x0 = int(np.floor((lon - dlon + 180.0) / self.cell_deg))
+        x1 = int(np.floor((lon + dlon + 180.0) / self.cell_deg))
+        n_cells = (y1 - y0 + 1) * min(x1 - x0 + 1, self._n_lon)
+
+        if n_cells >= len(self._keys):
+            # The box covers more cells than are populated: check every row
+            candidates = self._rows
+        else:
+            xs = np.unique(np.arange(x0, x1 + 1) % self._n_lon)
+            wanted = (np.arange(y0, y1 + 1)[:, None] * self._n_lon + xs[None, :]).ravel()
+            pos = np.searchsorted(self._keys, wanted)
+            pos = pos[(pos < len(self._keys)) & (self._keys[np.minimum(pos, len(self._keys) - 1)] == wanted)]
+            candidates = np.concatenate(
+                [self._rows[self._starts[i]:self._ends[i]] for i in pos]
+            ) if pos.size else np.empty(0, dtype=np.intp)
+        if self._extra.size:
+            candidates = np.concatenate([candidates, self._extra])
+
+        dist = self.distances(candidates, lat, lon)
+        keep = dist <= radius_km
+        # Moved rows can be listed twice (old cell and extra); keep each once
+        rows, first = np.unique(candidates[keep], return_index=True)
+        return rows, dist[keep][first]
+
+
+class SharedSnapshot:
+    """
+    Handle to a recommender snapshot held in one shared memory block, as
+    returned by `ZomatoRecommender.share`. It pickles to the block name
+    plus the array layout, so it is cheap to send to worker processes.
+    """
+
+    # Byte alignment of each array within the block
+    ALIGN = 64
+
+    def __init__(self, block: shared_memory.SharedMemory, manifest: dict, layout: Dict[str, tuple]):
+        self.name = block.name
+        self.manifest = manifest
+        self.layout = layout
+        self._block: Optional[shared_memory.SharedMemory] = block
+
+    def __getstate__(self) -> dict:
+        return {'name': self.name, 'manifest': self.manifest, 'layout': self.layout}
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._block = None
+
+    @property
+    def size(self) -> int:
+        return self.block().size
+
+    def block(self) -> shared_memory.SharedMemory:
+        # Map the block by name in processes that did not create it
+        if self._block is None:
+            self._block = shared_memory.SharedMemory(name=self.name)
+            # Only the creator may free the block; stop this process's
+            # resource tracker from unlinking it when the process exits
+            resource_tracker.unregister(self._block._name, 'shared_memory')
+        return self._block
+
+    def unlink(self):
+        """
+        Free the block. Call once, from the creating process, after all
+        workers have detached; existing mappings stay valid until closed.
+        """
+        block = self.block()
+        # An attach sharing our resource tracker (same or forked process) may
+        # have dropped the registration that unlink() expects to remove
+        resource_tracker.register(block._name, 'shared_memory')
+        block.unlink()
+
+
+class _SimilarityIndex:
+    """
+    Per-restaurant features for "more like this" queries: TF-IDF over
+    cuisine tokens, the cost category, the normalized rating and votes
+    components, and a coarse geo cell. Similarity is the weighted sum of
+    the per-block similarities (cosine for cuisines and quality, 1 for a
+    shared cost or cell).
+
+    Rows with the same cuisines, cost and cell share every block but
+    quality, so they are grouped. A query scores the groups (a few
+    thousand even for millions of rows), then visits their rows from the
+    group with the highest possible similarity down, in batches, each with
+    a bound on what any later row can reach. The group cuisine block is
+    CSR, or optionally a dense float32 matrix.
+    """
+
+    WEIGHTS = {'cuisine': 0.5, 'cost': 0.15, 'quality': 0.15, 'geo': 0.2}
+    GEO_CELL_DEG = 0.5
+
+    def __init__(
+        self,
+        token_rows: np.ndarray,
+        token_codes: np.ndarray,
+        n_tokens: int,
+        cuisine_keys: np.ndarray,
+        cost_codes: np.ndarray,
+        rating_score: np.ndarray,
+        votes_score: np.ndarray,
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        dense: bool = False
+    ):
+        # `cuisine_keys` is equal for rows whose cuisine tokens are equal
+        n = len(cost_codes)
+
+        counts = sparse.csr_matrix(
+            (np.ones(len(token_rows), dtype=np.float32), (token_rows, token_codes)),
+            shape=(n, n_tokens)
+        )
+        counts.sum_duplicates()
+        # Smoothed idf and unit-length rows, as sklearn's TfidfTransformer
+        # computes them, without paying for importing it
+        idf = np.log((1 + n) / (1 + np.bincount(counts.indices, minlength=n_tokens))) + 1
+        weights = counts.data * idf[counts.indices]
+        row_ids = np.repeat(np.arange(n), np.diff(counts.indptr))
+        norms = np.sqrt(np.bincount(row_ids, weights ** 2, minlength=n))
+        cuisine = sparse.csr_matrix(
+            ((weights / norms[row_ids]).astype(np.float32), counts.indices, counts.indptr), shape=(n, n_tokens)
+        )
+
+        located = np.isfinite(latitude) & np.isfinite(longitude)
+        cells = np.where(
+            located,
+            np.floor((np.nan_to_num(latitude).astype(np.float64) + 90.0) / self.GEO_CELL_DEG) * 1_000_000
+            + np.floor((np.nan_to_num(longitude).astype(np.float64) + 180.0) / self.GEO_CELL_DEG),
+            np.nan
+        )
+        cells = pd.factorize(cells, use_na_sentinel=True)[0]
+
+        groups = pd.DataFrame({'cuisine': cuisine_keys, 'cost': cost_codes, 'cell': cells}).groupby(
+            ['cuisine', 'cost', 'cell'], sort=False
+        ).ngroup().to_numpy()
+        self._group_rows = np.argsort(groups, kind='stable')
+        sizes = np.bincount(groups, minlength=groups.max() + 1 if n else 0)
+        self._group_ends = np.cumsum(sizes)
+        self._group_starts = self._group_ends - sizes
+        first = self._group_rows[self._group_starts]
+        self._group_cuisine = cuisine[first].toarray() if dense else cuisine[first]
+        self._group_cost = np.asarray(cost_codes)[first]
+        self._group_cell = cells[first]
+        self._row_group = groups
+        self._cuisine = cuisine
+        self.update_quality(rating_score, votes_score)
+
+    def update_quality(self, rating_score: np.ndarray, votes_score: np.ndarray):
+        """
+        Swap in new rating and votes components. They are the only block
+        rating and vote changes touch, so the groups stay as they are.
+        """
+        # Two components in [0, 1]; two perfect scores give a similarity of 1
+        self._quality = np.column_stack([np.nan_to_num(rating_score), np.nan_to_num(votes_score)]).astype(np.float32)
+        # Best quality components in each group, to bound its rows
+        self._group_quality = (
+            np.maximum.reduceat(self._quality[self._group_rows], self._group_starts)
+            if self._group_rows.size else np.zeros((0, 2), dtype=np.float32)
+        )
+
+    def batches(self, row: int):
+        """
+        Every row with its similarity to `row`, in batches of whole groups,
+        most promising groups first. Each batch comes with the highest
+        similarity any row in a later batch can have (-inf after the last).
+        """
+        weights = self.WEIGHTS
+        group = self._row_group[row]
+        query = self._cuisine[row].toarray().ravel()
+        static = weights['cuisine'] * np.asarray(self._group_cuisine @ query).ravel()
+        if self._group_cost[group] >= 0:
+            static = static + weights['cost'] * (self._group_cost == self._group_cost[group])
+        if self._group_cell[group] >= 0:
+            static = static + weights['geo'] * (self._group_cell == self._group_cell[group])
+        quality = weights['quality'] / 2 * self._quality[row]
+        best = static + self._group_quality @ quality
+        order = np.argsort(-best, kind='stable')
+
+        start, take = 0, 1
+        while start < order.size:
+            chosen = order[start:start + take]
+            start, take = start + take, take * 2
+            sizes = self._group_ends[chosen] - self._group_starts[chosen]
+            rows = np.concatenate([
+                self._group_rows[self._group_starts[g]:self._group_ends[g]] for g in chosen
+            ])
+            scores = (np.repeat(static[chosen], sizes) + self._quality[rows] @ quality).astype(np.float32)
+            yield rows, scores, (best[order[start]] if start < order.size else -np.inf)
+
+
+class _ReadWriteLock:
+    """
+    Any number of readers or one writer. A waiting writer holds back new
+    readers so a steady stream of queries cannot starve upsert; a thread
+    already reading may read again without waiting.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def read(self):
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            with self._condition:
+                while self._writing or self._writers_waiting:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._condition:
+                    self._readers -= 1
+                    if self._readers == 0:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+def _reads(method: Callable) -> Callable:
+    # Run a method under the recommender's read lock
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.read():
+            return method(self, *args, **kwargs)
+    return locked
+
+
+def _writes(method: Callable) -> Callable:
+    # Run a method under the recommender's write lock
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self._lock.write():
+            return method(self, *args, **kwargs)
+    return locked
 
 
 class ZomatoRecommender:
-    def __init__(self, data: pd.DataFrame):
+    # Bumped whenever the on-disk snapshot layout changes
+    SNAPSHOT_VERSION = 5
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        stats: Optional[RecommenderStats] = None,
+        scoring: Optional[Scoring] = None,
+        similarity: Optional[str] = 'sparse'
+    ):
+        self._init_schema()
+        # Optional instrumentation; set `stats` to a RecommenderStats to enable
+        self.stats = stats
+        self.scoring = scoring if scoring is not None else Scoring()
+
         # Make a copy and normalize text columns for robust matching
         self.data = data.copy()
-        # lowercase key text fields
-        self.data['City'] = self.data['City'].str.lower().str.strip()
-        self.data['Primary Cuisine'] = self.data['Primary Cuisine'].str.lower().str.strip()
+        self._data_readonly = False
+        self._encode_columns()
+
+        self._init_codes()
+        self._init_vocabularies()
+
+        # Numeric fields as contiguous float32 arrays for scoring
+        self._rating = self._float_column('Rating')
+        self._votes = self._float_column('Votes')
+        self._latitude = self._float_column('Latitude')
+        self._longitude = self._float_column('Longitude')
+        # Sorted copies of those arrays behind numeric range filters
+        self._sorted = {
+            column: _SortedColumn(getattr(self, attr))
+            for column, attr in self._numeric_columns.items()
+        }
+
+        self._init_scores()
 
-        # Precompute normalization constants
-        self._min_rating = self.data['Rating'].min()
-        self._max_rating = self.data['Rating'].max()
-        self._min_votes = self.data['Votes'].min()
-        self._max_votes = self.data['Votes'].max()
+        # Posting-list indexes: category code -> sorted row positions
+        self._city_index = self._build_index(self._city_codes, len(self._cities))
+        self._cost_index = self._build_index(self._cost_codes, len(self._budget_order))
 
+        # Cuisine token index over every listed cuisine: token code -> sorted rows
+        token_rows, tokens = self._tokenize(np.arange(len(self.data)))
+        token_codes, vocabulary = pd.factorize(tokens, sort=True)
+        self._tokens = list(vocabulary)
+        self._token_lookup = {token: code for code, token in enumerate(self._tokens)}
+        self._token_index = [
+            token_rows[positions]
+            for positions in self._build_index(token_codes, len(self._tokens))
+        ]
+        # Removed restaurants keep their row as a tombstone so positions stay stable
+        self._alive = np.ones(len(self.data), dtype=bool)
+        self._all_rows = np.arange(len(self.data))
+
+        # Spatial index over coordinates for proximity queries
+        self._geo_index = _GeoGrid(self._latitude, self._longitude)
+
+        # Feature matrix behind similar_to ('sparse', 'dense' or None to disable)
+        self._init_similarity(similarity)
+
+        self._init_cells()
+        self._init_cache(cache_size, cache_ttl)
+        # Queries read under it; upsert and remove write under it
+        self._lock = _ReadWriteLock()
+
+    def _init_schema(self):
         # Define budget ordering
         self._budget_order = ['low', 'medium', 'high']
 
-    def _filter(
+        # Columns returned with every recommendation, coordinates included
+        self._required_columns = [
+            'Restaurant Name', 'City', 'Primary Cuisine',
+            'Cost Category', 'Rating', 'Votes', 'Longitude', 'Latitude'
+        ]
+        # Data columns shown in results when present, then computed columns
+        self._data_columns = self._required_columns[:3] + ['Cuisines'] + self._required_columns[3:]
+        self._output_columns = self._data_columns + [
+            'Distance (km)', 'Score', 'Cuisine Matches', 'Explanation', 'Relaxed'
+        ]
+        # Numeric columns that accept range filters, and the arrays holding them
+        self._numeric_columns = {
+            'Rating': '_rating', 'Votes': '_votes',
+            'Latitude': '_latitude', 'Longitude': '_longitude'
+        }
+
+    def _encode_columns(self):
+        # Store key text fields as categoricals: compact integer codes plus a vocabulary
+        self.data['City'] = pd.Categorical(self.data['City'].str.lower().str.strip())
+        self.data['Primary Cuisine'] = pd.Categorical(self.data['Primary Cuisine'].str.lower().str.strip())
+        if 'Cuisines' in self.data.columns:
+            # Full comma-separated cuisine list; few distinct lists, so categorical too
+            self.data['Cuisines'] = pd.Categorical(self.data['Cuisines'].str.lower().str.strip())
+        # Cost codes follow the budget ordering so ranges become code ranges
+        self.data['Cost Category'] = pd.Categorical(
+            self.data['Cost Category'].str.lower().str.strip(),
+            categories=self._budget_order
+        )
+        self.data['Restaurant Name'] = pd.Categorical(self.data['Restaurant Name'])
+
+    def _init_codes(self):
+        # Views of the categorical codes; `.cat.codes` would copy them, which
+        # for attached recommenders means a private copy per process
+        self._city_codes = self.data['City'].array.codes
+        self._cuisine_codes = self.data['Primary Cuisine'].array.codes
+        self._cost_codes = self.data['Cost Category'].array.codes
+
+    def _init_vocabularies(self):
+        # Alphabetical rank of each restaurant name, used to break score ties;
+        # names start as sorted categories, so the codes are the ranks
+        names = self.data['Restaurant Name'].cat
+        self._name_rank = self.data['Restaurant Name'].array.codes
+        if not names.categories.is_monotonic_increasing:
+            # Names added later are appended to the categories; rank them properly
+            rank_of_code = np.empty(len(names.categories), dtype=np.int64)
+            rank_of_code[np.argsort(names.categories.to_numpy())] = np.arange(len(names.categories))
+            self._name_rank = rank_of_code[self._name_rank]
+        # Lower-cased name -> row positions, built on first use by similar_to
+        self._name_lookup: Optional[Dict[str, np.ndarray]] = None
+        # Display lists for pickers, built on first use by vocabularies
+        self._vocabularies: Optional[Dict[str, List[str]]] = None
+
+        self._cities = list(self.data['City'].cat.categories)
+        self._cuisines = list(self.data['Primary Cuisine'].cat.categories)
+        self._city_lookup = {city: code for code, city in enumerate(self._cities)}
+        self._city_resolver = _CityResolver(self._cities)
+
+    def _init_scores(self):
+        # Precompute the static, normalized score components for every row
+        self._rating_score, self._votes_score = self.scoring.static_scores(
+            self._rating, self._votes, self._city_codes
+        )
+
+    def _init_similarity(self, mode: Optional[str], build: bool = True):
+        if mode not in (None, 'sparse', 'dense'):
+            raise ValueError("similarity must be 'sparse', 'dense' or None")
+        self._similarity_mode = mode
+        # None until built; updates other than ratings and votes reset it
+        # and similar_to rebuilds on demand
+        self._similarity: Optional[_SimilarityIndex] = None
+        if mode is not None and build:
+            self._similarity = self._build_similarity()
+
+    def _build_similarity(self) -> _SimilarityIndex:
+        lengths = [len(postings) for postings in self._token_index]
+        token_rows = np.concatenate(self._token_index) if lengths else np.empty(0, dtype=np.intp)
+        # Tokens come from Cuisines, else Primary Cuisine; removed rows have none
+        cuisine_keys = self._cuisine_codes.astype(np.int64)
+        if 'Cuisines' in self.data.columns:
+            listed = self.data['Cuisines'].cat
+            cuisine_keys = cuisine_keys * (len(listed.categories) + 1) + listed.codes.to_numpy() + 1
+        cuisine_keys = np.where(self._alive, cuisine_keys, -1)
+        return _SimilarityIndex(
+            token_rows, np.repeat(np.arange(len(lengths)), lengths), len(lengths),
+            cuisine_keys, self._cost_codes,
+            self._rating_score, self._votes_score,
+            self._latitude, self._longitude,
+            dense=self._similarity_mode == 'dense'
+        )
+
+    def _init_cells(self):
+        # Materialized top-N cells: off until `precompute` sets (depth, w_rating, w_votes)
+        self._cells_config: Optional[Tuple[int, float, float]] = None
+        self._cells: Optional[_TopCells] = None
+
+    def _init_cache(self, cache_size: int, cache_ttl: Optional[float]):
+        # Opt-in LRU of finished results (cache_size=0 disables it);
+        # entries expire after cache_ttl seconds
+        self._cache = ResultCache(cache_size, cache_ttl)
+
+    def _tokenize(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (row position, cuisine token) pairs for the rows at `positions`,
+        sorted by row. Tokens come from the full 'Cuisines' list, falling
+        back to 'Primary Cuisine' where it is missing.
+        """
+        frame = self.data.iloc[positions]
+        source = frame['Primary Cuisine'].astype(object)
+        if 'Cuisines' in frame.columns:
+            source = frame['Cuisines'].astype(object).where(frame['Cuisines'].notna(), source)
+        tokens = pd.Series(source.to_numpy(), index=positions).str.split(',').explode().str.strip()
+        tokens = tokens[tokens.notna() & (tokens != '')]
+        pairs = pd.DataFrame({'row': tokens.index.to_numpy(), 'token': tokens.to_numpy()}).drop_duplicates()
+        return pairs['row'].to_numpy(dtype=np.intp), pairs['token'].to_numpy(dtype=object)
+
+    def _float_column(self, column: str) -> np.ndarray:
+        if column not in self.data.columns:
+            return np.full(len(self.data), np.nan, dtype=np.float32)
+        return np.ascontiguousarray(self.data[column].to_numpy(dtype=np.float32))
+
+    @staticmethod
+    def _build_index(codes: np.ndarray, n_codes: int) -> List[np.ndarray]:
+        # Group row positions by code in one stable sort instead of one scan per value;
+        # missing values (code -1) sort first and fall outside every posting list
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(n_codes + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(n_codes)]
+
+    @staticmethod
+    def _union(postings: List[np.ndarray]) -> np.ndarray:
+        if not postings:
+            return np.empty(0, dtype=np.intp)
+        if len(postings) == 1:
+            # Posting lists are already sorted and unique
+            return postings[0]
+        # Sort and drop repeats; much cheaper than np.unique on large inputs
+        rows = np.sort(np.concatenate(postings))
+        first = np.ones(rows.size, dtype=bool)
+        first[1:] = rows[1:] != rows[:-1]
+        return rows[first]
+
+    def _constraints(
         self,
         cuisines: Optional[List[str]],
         budget_range: Optional[Tuple[str, str]],
         location: Optional[str]
-    ) -> pd.DataFrame:
-        df = self.data.copy()  # Fresh copy for each filter operation
+    ) -> Tuple[Dict[str, Optional[np.ndarray]], List[np.ndarray]]:
+        """
+        Resolve each constraint once to the sorted row positions satisfying
+        it; constraints that were not given map to None. Also returns, per
+        requested cuisine, the rows serving it (for match counts).
+        """
+        constraints = {'cuisine': None, 'budget': None, 'location': None}
+        term_rows = []
+        stats = self.stats
+        if stats is not None:
+            t = stats.clock()
 
-        # Cuisine filter
+        # Cuisine filter: match each query term as a whole word against the
+        # cuisine token vocabulary; a restaurant serving any of them matches
         if cuisines:
-            cuisines = [c.strip().lower() for c in cuisines]
-            pattern = '|'.join([re.escape(c) for c in cuisines])
-            df = df[df['Primary Cuisine'].str.contains(
-                r'\b(' + pattern + r')\b',
-                case=False,
-                na=False,
-                regex=False
-            )]
+            for term in dict.fromkeys(c.strip().lower() for c in cuisines):
+                term_rows.append(self._union([self._token_index[code] for code in self._term_tokens(term)]))
+            constraints['cuisine'] = self._union(term_rows)
+            if stats is not None:
+                t = stats.lap('cuisine', t)
+                stats.rows('cuisine', constraints['cuisine'].size)
 
         # Budget filter
         if budget_range:
-            low, high = [b.strip().lower() for b in budget_range]
-            if low not in self._budget_order or high not in self._budget_order:
-                raise ValueError(f"Budget categories must be one of {self._budget_order}")
-            
-            low_idx = self._budget_order.index(low)
-            high_idx = self._budget_order.index(high)
-            
-            if low_idx > high_idx:
-                raise ValueError(f"Budget range lower bound '{low}' cannot exceed upper bound '{high}'")
-            
-            allowable = self._budget_order[low_idx:high_idx+1]
-            df = df[df['Cost Category'].str.lower().str.strip().isin(allowable)]
-
-        # Location filter
+            low_idx, high_idx = self._budget_span(budget_range)
+            constraints['budget'] = self._union(self._cost_index[low_idx:high_idx+1])
+            if stats is not None:
+                t = stats.lap('budget', t)
+                stats.rows('budget', constraints['budget'].size)
+
+        # Location filter; a resolver shared with other shards can name
+        # cities this recommender does not hold, which match nothing here
         if location:
-            loc = location.strip().lower()
-            # First try exact match
-            exact_matches = df[df['City'] == loc]
-            if not exact_matches.empty:
-                df = exact_matches
-            else:
-                # Then try fuzzy match
-                candidates = get_close_matches(loc, df['City'].unique(), n=3, cutoff=0.5)
-                if candidates:
-                    df = df[df['City'].isin(candidates)]
-                else:
-                    # Finally try substring match
-                    df = df[df['City'].str.contains(loc, case=False, na=False)]
+            constraints['location'] = self._union([
+                self._city_index[self._city_lookup[city]]
+                for city in self._resolve_location(location)
+                if city in self._city_lookup
+            ])
+            if stats is not None:
+                t = stats.lap('location', t)
+                stats.rows('location', constraints['location'].size)
 
-        return df
+        return constraints, term_rows
+
+    def _term_tokens(self, term: str) -> List[int]:
+        # Codes of the cuisine tokens containing `term` as a whole word
+        pattern = re.compile(r'\b' + re.escape(term) + r'\b')
+        return [code for code, token in enumerate(self._tokens) if pattern.search(token)]
+
+    def _budget_span(self, budget_range: Tuple[str, str]) -> Tuple[int, int]:
+        # Cost codes bounding a (low, high) budget range, validated
+        low, high = [b.strip().lower() for b in budget_range]
+        if low not in self._budget_order or high not in self._budget_order:
+            raise ValueError(f"Budget categories must be one of {self._budget_order}")
+        
+        low_idx = self._budget_order.index(low)
+        high_idx = self._budget_order.index(high)
+        
+        if low_idx > high_idx:
+            raise ValueError(f"Budget range lower bound '{low}' cannot exceed upper bound '{high}'")
+        return low_idx, high_idx
+
+    @staticmethod
+    def _match_counts(rows: np.ndarray, term_rows: List[np.ndarray]) -> np.ndarray:
+        # How many of the requested cuisines each row serves
+        counts = np.zeros(len(rows), dtype=np.int64)
+        for served in term_rows:
+            counts += np.isin(rows, served, assume_unique=True)
+        return counts
+
+    def _intersect(self, row_sets: List[np.ndarray], ranges: tuple = ()) -> np.ndarray:
+        """
+        Intersect sorted row sets, smallest first so intermediates stay
+        small, then keep the rows inside every numeric range. When no row
+        set narrows the search, the most selective range is read off its
+        sorted index to seed it instead of scanning every row.
+        """
+        ranges = list(ranges)
+        if not row_sets and ranges:
+            spans = [self._sorted[column].span(low, high) for column, low, high in ranges]
+            seed = int(np.argmin([end - start for start, end in spans]))
+            row_sets = [self._sorted[ranges.pop(seed)[0]].rows(*spans[seed])]
+        if not row_sets:
+            return self._all_rows
+        row_sets = sorted(row_sets, key=len)
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            if rows.size == 0:
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        for column, low, high in ranges:
+            values = getattr(self, self._numeric_columns[column])[rows]
+            rows = rows[(values >= low) & (values <= high)]
+        return rows
+
+    def _resolve_location(self, location: str) -> Tuple[str, ...]:
+        # Map a free-text location onto known cities (memoized per input)
+        return self._city_resolver.resolve(location.strip().lower())
 
     def _score(
         self,
-        df: pd.DataFrame,
+        rows: np.ndarray,
         w_rating: float = 0.7,
         w_votes: float = 0.3
-    ) -> pd.Series:
-        # Safely normalize rating and votes
-        if (self._max_rating - self._min_rating) < 1e-6:
-            nr = 0.5
-        else:
-            nr = (df['Rating'] - self._min_rating) / (self._max_rating - self._min_rating)
+    ) -> np.ndarray:
+        # Components are normalized at construction; only the blend is per query
+        return w_rating * self._rating_score[rows] + w_votes * self._votes_score[rows]
+
+    def _ranges(
+        self,
+        min_rating: Optional[float] = None,
+        min_votes: Optional[float] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None
+    ) -> tuple:
+        """
+        Numeric predicates as a sorted tuple of (column, low, high) with
+        inclusive float32 bounds, open ends as -inf/inf. `min_rating` and
+        `min_votes` are shorthand for lower bounds on Rating and Votes.
+        """
+        def bound(value: Optional[float], open_end: float) -> np.float32:
+            # DataFrame inputs carry missing bounds as NaN
+            return np.float32(open_end if value is None or np.isnan(value) else value)
 
-        if (self._max_votes - self._min_votes) < 1e-6:
-            nv = 0.5
+        bounds = {}
+        for column, (low, high) in (ranges or {}).items():
+            if column not in self._numeric_columns:
+                raise ValueError(f"Range filters apply to {list(self._numeric_columns)}, not '{column}'")
+            low, high = bound(low, -np.inf), bound(high, np.inf)
+            if low > high:
+                raise ValueError(f"{column} range lower bound {low:g} cannot exceed upper bound {high:g}")
+            bounds[column] = (low, high)
+        for column, low in (('Rating', min_rating), ('Votes', min_votes)):
+            # Combined with an explicit range the tighter bound wins
+            current = bounds.get(column, (np.float32(-np.inf), np.float32(np.inf)))
+            bounds[column] = (max(current[0], bound(low, -np.inf)), current[1])
+
+        return tuple(
+            (column, low, high) for column, (low, high) in sorted(bounds.items())
+            if np.isfinite(low) or np.isfinite(high)
+        )
+
+    @staticmethod
+    def _query_key(
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: Optional[str]
+    ) -> tuple:
+        # Queries with the same key select exactly the same candidate rows
+        return (
+            tuple(sorted({c.strip().lower() for c in cuisines})) if cuisines else None,
+            tuple(b.strip().lower() for b in budget_range) if budget_range else None,
+            location.strip().lower() if location else None
+        )
+
+    def _candidates(
+        self,
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: Optional[str],
+        within: Optional[np.ndarray] = None,
+        ranges: tuple = ()
+    ) -> Tuple[np.ndarray, str, List[np.ndarray]]:
+        """
+        Rows matching every constraint, or failing that the first fallback
+        (dropping cuisine, then budget, then location) with any matches.
+        Returns the rows, which constraint was relaxed ('none' if none) and
+        the per-cuisine row sets from `_constraints`. A proximity
+        restriction and numeric `ranges` (from `_ranges`) are never relaxed.
+        """
+        constraints, term_rows = self._constraints(cuisines, budget_range, location)
+        active = {name: rows for name, rows in constraints.items() if rows is not None}
+        base = [] if within is None else [within]
+        stats = self.stats
+        if stats is not None:
+            t = stats.clock()
+
+        filtered = self._intersect(base + list(active.values()), ranges)
+        if stats is not None:
+            t = stats.lap('intersect', t)
+        if filtered.size > 0:
+            return self._counted(filtered, 'none', term_rows)
+
+        # Fallback logic if no exact matches, reusing the resolved constraints
+        for dropped in active:
+            fallback_results = self._intersect(
+                base + [rows for name, rows in active.items() if name != dropped], ranges
+            )
+            if fallback_results.size > 0:
+                if stats is not None:
+                    stats.lap('fallback', t)
+                return self._counted(fallback_results, dropped, term_rows)
+
+        if stats is not None:
+            stats.lap('fallback', t)
+        return self._counted(filtered, 'none', term_rows)
+
+    def _counted(
+        self,
+        rows: np.ndarray,
+        relaxed: str,
+        term_rows: List[np.ndarray]
+    ) -> Tuple[np.ndarray, str, List[np.ndarray]]:
+        # Report the candidates `_candidates` settled on, then pass them through
+        if self.stats is not None:
+            self.stats.rows('candidates', rows.size)
+            self.stats.fallback(relaxed)
+        return rows, relaxed, term_rows
+
+    def _proximity(
+        self,
+        near: Optional[Tuple[float, float]],
+        radius_km: float
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        # Rows within radius_km of `near` and their distances, or (None, None)
+        if near is None:
+            return None, None
+        return self._geo_index.within(float(near[0]), float(near[1]), radius_km)
+
+    @staticmethod
+    def _blend_matches(
+        scores: np.ndarray,
+        matches: np.ndarray,
+        n_terms: int,
+        w_match: float
+    ) -> np.ndarray:
+        # Rows serving more of the requested cuisines earn up to w_match extra
+        if not w_match or not n_terms:
+            return scores
+        return scores + w_match * (matches / n_terms)
+
+    @staticmethod
+    def _blend_distance(
+        scores: np.ndarray,
+        distances: np.ndarray,
+        radius_km: float,
+        w_distance: float
+    ) -> np.ndarray:
+        # Closer rows earn up to w_distance extra, falling linearly to 0 at the radius
+        if not w_distance:
+            return scores
+        return scores + w_distance * (1.0 - distances / radius_km)
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, top_n: int) -> np.ndarray:
+        """
+        Positions (into `rows`/`scores`) of the `top_n` best rows, highest
+        score first. Ties go to more votes, then restaurant name, then row
+        order, so the ranking is a total order and any prefix of a longer
+        ranking equals the shorter one.
+        """
+        if top_n <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        # A missing rating or vote count makes a NaN score; rank it last
+        # instead of letting np.partition treat it as the largest
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+        if top_n < scores.size:
+            # Partition out the top_n scores, then widen to every row tied
+            # with the cut-off so the tie-break below sees all of them
+            kth = np.partition(scores, scores.size - top_n)[scores.size - top_n]
+            candidates = np.flatnonzero(scores >= kth)
         else:
-            nv = (df['Votes'] - self._min_votes) / (self._max_votes - self._min_votes)
+            candidates = np.arange(scores.size)
+
+        cand_rows = rows[candidates]
+        order = np.lexsort((
+            cand_rows,
+            self._name_rank[cand_rows],
+            -self._votes[cand_rows],
+            -scores[candidates]
+        ))
+        return candidates[order[:top_n]]
 
-        return w_rating * nr + w_votes * nv
+    def _result(
+        self,
+        rows: np.ndarray,
+        scores: np.ndarray,
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: Optional[str],
+        distances: Optional[np.ndarray] = None,
+        radius_km: Optional[float] = None,
+        relaxed: str = 'none',
+        explain: bool = True,
+        matches: Optional[np.ndarray] = None,
+        ranges: tuple = ()
+    ) -> pd.DataFrame:
+        return self._results([{
+            'rows': rows, 'scores': scores, 'cuisines': cuisines,
+            'budget_range': budget_range, 'location': location,
+            'distances': distances, 'radius_km': radius_km, 'relaxed': relaxed,
+            'explain': explain, 'matches': matches, 'ranges': ranges,
+        }])[0]
+
+    def _results(self, answers: List[dict]) -> List[pd.DataFrame]:
+        """
+        One result frame per answer, where an answer holds the arguments of
+        `_result`. The selected rows of every answer are fetched, decoded
+        and explained together; each frame then only slices that batch.
+        """
+        stats = self.stats
+        if stats is not None:
+            t = stats.clock()
+
+        # Only the final ranked rows are materialized
+        bounds = np.cumsum([0] + [len(answer['rows']) for answer in answers])
+        columns = self._available_columns()
+        selected = self._decode(self.data.iloc[np.concatenate([answer['rows'] for answer in answers])][columns])
+        arrays = {col: selected[col].array for col in columns}
+        if stats is not None:
+            t = stats.lap('materialize', t)
+
+        # Generate explanations: the query part is shared, only the rating varies
+        explanations = None
+        if any(answer['explain'] for answer in answers):
+            prefixes = np.repeat(np.array([
+                self._explain_prefix(
+                    answer['cuisines'], answer['budget_range'], answer['location'],
+                    answer['radius_km'], answer['ranges']
+                ) if answer['explain'] else ''
+                for answer in answers
+            ]), np.diff(bounds))
+            ratings = np.char.mod('%.1f', selected['Rating'].to_numpy(dtype=np.float64))
+            explanations = np.char.add(np.char.add(np.char.add(prefixes, 'rating:'), ratings), '★')
+            if stats is not None:
+                t = stats.lap('explain', t)
+
+        results = []
+        for answer, start, end in zip(answers, bounds[:-1], bounds[1:]):
+            computed = {'Score': answer['scores'], 'Relaxed': np.full(end - start, answer['relaxed'], dtype=object)}
+            if answer['distances'] is not None:
+                computed['Distance (km)'] = answer['distances']
+            if answer['matches'] is not None:
+                computed['Cuisine Matches'] = answer['matches']
+            if answer['explain']:
+                computed['Explanation'] = explanations[start:end]
+            # Ensure we only return columns that exist
+            results.append(pd.DataFrame({
+                col: arrays[col][start:end] if col in arrays else computed[col]
+                for col in self._output_columns if col in arrays or col in computed
+            }, index=selected.index[start:end], copy=False))
+        if stats is not None:
+            stats.lap('split', t)
+        return results
+
+    @staticmethod
+    def _explain_prefix(
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: Optional[str],
+        radius_km: Optional[float] = None,
+        ranges: tuple = ()
+    ) -> str:
+        # The query-derived part of every explanation
+        parts = []
+        if cuisines:
+            parts.append(f"{len(cuisines)} cuisines matched")
+        if budget_range:
+            parts.append(f"budget:{budget_range[0]}-{budget_range[1]}")
+        if location:
+            parts.append(f"near:{location}")
+        if radius_km is not None:
+            parts.append(f"within:{radius_km:g}km")
+        for column, low, high in ranges:
+            if not np.isfinite(high):
+                parts.append(f"{column.lower()}>={low:g}")
+            elif not np.isfinite(low):
+                parts.append(f"{column.lower()}<={high:g}")
+            else:
+                parts.append(f"{column.lower()}:{low:g}-{high:g}")
+        return "".join(part + " | " for part in parts)
+
+    def _available_columns(self) -> List[str]:
+        # Check which columns actually exist in our data
+        return [col for col in self._data_columns if col in self.data.columns]
+
+    def _empty_result(
+        self,
+        near: Optional[Tuple[float, float]] = None,
+        cuisines: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        # Same columns a non-empty result for this query would have
+        skip = set(self._data_columns) - set(self._available_columns())
+        if near is None:
+            skip.add('Distance (km)')
+        if not cuisines:
+            skip.add('Cuisine Matches')
+        return pd.DataFrame(columns=[col for col in self._output_columns if col not in skip])
+
+    def _decode(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Hand results back with plain string columns instead of categorical codes
+        df = df.copy()
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(self.data[col].cat.categories.dtype)
+        return df
 
+    @_reads
     def recommend(
         self,
         cuisines: Optional[List[str]] = None,
         budget_range: Optional[Tuple[str, str]] = None,
         location: Optional[str] = None,
-        top_n: int = 5
+        top_n: int = 5,
+        w_rating: float = 0.7,
+        w_votes: float = 0.3,
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: float = 5.0,
+        w_distance: float = 0.0,
+        explain: bool = True,
+        w_match: float = 0.0,
+        min_rating: Optional[float] = None,
+        min_votes: Optional[float] = None,
+        ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None
     ) -> pd.DataFrame:
         """
-        Enhanced recommendation with proper coordinate handling
+        Enhanced recommendation with proper coordinate handling.
+        `near=(lat, lon)` keeps only restaurants within `radius_km` of that
+        point, adds a 'Distance (km)' column and, with `w_distance`, blends
+        closeness into the score. Cuisines match any cuisine a restaurant
+        lists; 'Cuisine Matches' counts how many requested cuisines it
+        serves and `w_match` rewards serving more of them.
+        `explain=False` skips building the 'Explanation' column.
+        `min_rating`, `min_votes` and `ranges` ({column: (low, high)},
+        inclusive, None for an open end; Rating, Votes, Latitude or
+        Longitude) filter before ranking, so top_n counts only rows that
+        pass; like proximity, they are never relaxed.
+        Queries covered by `precompute` are served from its cells.
+        With the result cache enabled, repeated queries return the
+        cached DataFrame itself; treat results as read-only.
+        With `stats` set, per-stage timings and counts are recorded there.
         """
-        # First make sure we include coordinates in the filtered data
-        required_columns = [
-            'Restaurant Name', 'City', 'Primary Cuisine',
-            'Cost Category', 'Rating', 'Votes', 'Longitude', 'Latitude'
-        ]
-        
-        # Check which columns actually exist in our data
-        available_columns = [col for col in required_columns if col in self.data.columns]
-        
-        filtered = self._filter(cuisines, budget_range, location)
-        
-        # Fallback logic if no exact matches
-        if filtered.empty:
-            fallback_filters = [
-                (None, budget_range, location),  # Remove cuisine
-                (cuisines, None, location),     # Remove budget
-                (cuisines, budget_range, None)  # Remove location
-            ]
-            
-            for f_cuisine, f_budget, f_loc in fallback_filters:
-                fallback_results = self._filter(f_cuisine, f_budget, f_loc)
-                if not fallback_results.empty:
-                    filtered = fallback_results
-                    break
-
-        if filtered.empty:
-            return pd.DataFrame(columns=required_columns + ['Score', 'Explanation'])
-
-        # Score and rank results
-        df2 = filtered.copy()
-        df2['Score'] = self._score(df2)
-        df2 = df2.sort_values('Score', ascending=False).head(top_n)
-
-        # Generate explanations
-        def explain(row):
-            parts = []
-            if cuisines:
-                parts.append(f"{len(cuisines)} cuisines matched")
-            if budget_range:
-                parts.append(f"budget:{budget_range[0]}-{budget_range[1]}")
-            if location:
-                parts.append(f"near:{location}")
-            parts.append(f"rating:{row['Rating']:.1f}★")
-            return " | ".join(parts)
-
-        df2['Explanation'] = df2.apply(explain, axis=1)
-        
-        # Ensure we only return columns that exist
-        output_columns = [col for col in required_columns + ['Score', 'Explanation'] 
-                         if col in df2.columns]
-        
-        return df2[output_columns]
+        stats = self.stats
+        if stats is not None:
+            start = t = stats.clock()
+
+        predicates = self._ranges(min_rating, min_votes, ranges)
+        key = None
+        if self._cache.enabled:
+            key = self._cache_key(
+                cuisines, budget_range, location, top_n, w_rating, w_votes,
+                near, radius_km, w_distance, explain, w_match, predicates
+            )
+            cached = self._cache.get(key)
+            if stats is not None:
+                stats.cache(cached is not None)
+            if cached is not None:
+                if stats is not None:
+                    stats.lap('total', start)
+                return cached
+
+        result = None
+        # Read once: precompute may swap the cells while this query runs
+        cells = self._cells
+        if self._cells_serve(cells, location, top_n, w_rating, w_votes, near, w_match):
+            # Covered by the materialized cells; an empty merge means the
+            # query needs a fallback, which the full path below decides
+            rows, matches = self._from_cells(cells, cuisines, budget_range, location, top_n, predicates)
+            if stats is not None:
+                t = stats.lap('cells', t)
+            if rows is not None and rows.size:
+                result = self._result(
+                    rows, self._score(rows, w_rating, w_votes), cuisines, budget_range, location,
+                    explain=explain, matches=matches, ranges=predicates
+                )
+
+        if result is None:
+            within, within_dist = self._proximity(near, radius_km)
+            if stats is not None and near is not None:
+                t = stats.lap('proximity', t)
+                stats.rows('proximity', within.size)
+            filtered, relaxed, term_rows = self._candidates(
+                cuisines, budget_range, location, within, predicates
+            )
+            if stats is not None:
+                t = stats.lap('filter', t)
+
+            if filtered.size == 0:
+                result = self._empty_result(near, cuisines)
+            else:
+                # Score and rank results
+                scores = self._score(filtered, w_rating, w_votes)
+                matches = self._match_counts(filtered, term_rows) if cuisines else None
+                if matches is not None:
+                    scores = self._blend_matches(scores, matches, len(term_rows), w_match)
+                distances = None
+                if near is not None:
+                    distances = within_dist[np.searchsorted(within, filtered)]
+                    scores = self._blend_distance(scores, distances, radius_km, w_distance)
+                if stats is not None:
+                    t = stats.lap('score', t)
+                top = self._top(filtered, scores, top_n)
+                if stats is not None:
+                    stats.lap('rank', t)
+                result = self._result(
+                    filtered[top], scores[top], cuisines, budget_range, location,
+                    None if distances is None else distances[top],
+                    None if near is None else radius_km,
+                    relaxed,
+                    explain,
+                    None if matches is None else matches[top],
+                    predicates
+                )
+
+        if key is not None:
+            self._cache.put(key, result)
+        if stats is not None:
+            stats.lap('total', start)
+        return result
+
+    filter_and_rank = recommend
+
+    @_reads
+    def precompute(self, depth: int = 20, w_rating: float = 0.7, w_votes: float = 0.3):
+        """
+        Materialize the ranked top `depth` restaurants of every populated
+        (city, cost category, cuisine) cell, plus an any-cuisine cell per
+        (city, cost category), under these weights. `recommend` calls
+        they cover (a location, the same weights, top_n <= depth, no
+        proximity and no w_match) are then answered by merging the few
+        cells involved instead of filtering and scoring. Numeric filters
+        such as min_rating are applied during the merge; a query whose
+        filters exhaust a cell falls back to the full path.
+        upsert and remove rebuild the cells before returning, since they
+        can change every normalized score; queries in the meantime take
+        the full path. depth=0 turns this off.
+        """
+        if depth < 0:
+            raise ValueError("depth cannot be negative")
+        self._cells_config = (depth, w_rating, w_votes) if depth else None
+        self._cells = self._build_cells(*self._cells_config) if depth else None
+
+    @_reads
+    def _refresh_cells(self):
+        # Rebuild cells dropped by upsert/remove. Under the read lock
+        # queries keep running, on the full path, instead of waiting on it
+        config = self._cells_config
+        if config is not None and self._cells is None:
+            self._cells = self._build_cells(*config)
+
+    def _cell_keys(self, cities: np.ndarray, costs: np.ndarray, tokens: np.ndarray) -> np.ndarray:
+        # One integer per (city, cost slot, token slot); cost slot len(budget
+        # order) holds rows without a cost, token slot 0 is "any cuisine"
+        return (cities * (len(self._budget_order) + 1) + costs) * (len(self._tokens) + 1) + tokens
+
+    def _build_cells(self, depth: int, w_rating: float, w_votes: float) -> _TopCells:
+        rows = self._all_rows
+        scores = self._score(rows, w_rating, w_votes)
+        # One total order of live rows, the same one `_top` ranks by
+        ranked = rows[np.lexsort((rows, self._name_rank[rows], -self._votes[rows], -scores))]
+        rank = np.empty(len(self.data), dtype=np.intp)
+        rank[ranked] = np.arange(ranked.size)
+
+        # Every row sits in its any-cuisine cell and in one cell per cuisine token
+        lengths = [len(postings) for postings in self._token_index]
+        pair_rows = np.concatenate(self._token_index + [rows])
+        pair_tokens = np.concatenate([
+            np.repeat(np.arange(1, len(lengths) + 1), lengths), np.zeros(rows.size, dtype=np.intp)
+        ])
+        cities = self._city_codes[pair_rows]
+        costs = self._cost_codes[pair_rows]
+        costs = np.where(costs >= 0, costs, len(self._budget_order))
+        # Rows without a city never match a location, so no cell needs them
+        located = cities >= 0
+        keys = self._cell_keys(
+            cities[located].astype(np.int64), costs[located].astype(np.int64), pair_tokens[located]
+        )
+        return _TopCells(keys, rank[pair_rows[located]], ranked, depth, (w_rating, w_votes))
+
+    def _from_cells(
+        self,
+        cells: _TopCells,
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: str,
+        top_n: int,
+        ranges: tuple = ()
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Ranked rows for an unrelaxed query answered from the materialized
+        cells, with per-row cuisine match counts when cuisines were given.
+        Rows outside the numeric `ranges` are skipped while merging. No
+        rows means nothing matched, and `_candidates` should decide the
+        fallback; None means the cells ran out and the full path must rank.
+        """
+        cities = np.array([
+            self._city_lookup[city] for city in self._resolve_location(location) if city in self._city_lookup
+        ], dtype=np.int64)
+        if budget_range:
+            low, high = self._budget_span(budget_range)
+            costs = np.arange(low, high + 1)
+        else:
+            costs = np.arange(len(self._budget_order) + 1)
+        term_tokens = []
+        tokens = np.zeros(1, dtype=np.int64)
+        if cuisines:
+            term_tokens = [self._term_tokens(term) for term in dict.fromkeys(c.strip().lower() for c in cuisines)]
+            tokens = np.array(sorted({code + 1 for codes in term_tokens for code in codes}), dtype=np.int64)
+
+        def accept(rows: np.ndarray) -> np.ndarray:
+            keep = np.ones(rows.size, dtype=bool)
+            for column, low, high in ranges:
+                values = getattr(self, self._numeric_columns[column])[rows]
+                keep &= (values >= low) & (values <= high)
+            return keep
+
+        keys = self._cell_keys(cities[:, None, None], costs[None, :, None], tokens[None, None, :]).ravel()
+        rows = cells.top(keys, top_n, accept if ranges else None)
+        if rows is None or not cuisines:
+            return rows, None
+        # How many requested cuisines each row serves, by binary search in the token postings
+        matches = np.zeros(rows.size, dtype=np.int64)
+        for codes in term_tokens:
+            served = np.zeros(rows.size, dtype=bool)
+            for code in codes:
+                postings = self._token_index[code]
+                if postings.size:
+                    pos = np.minimum(np.searchsorted(postings, rows), postings.size - 1)
+                    served |= postings[pos] == rows
+            matches += served
+        return rows, matches
+
+    @staticmethod
+    def _cells_serve(
+        cells: Optional[_TopCells],
+        location: Optional[str],
+        top_n: int,
+        w_rating: float,
+        w_votes: float,
+        near: Optional[Tuple[float, float]],
+        w_match: float
+    ) -> bool:
+        # Whether `cells` can rank this query exactly like the full path;
+        # numeric ranges may still send it there (`_from_cells`)
+        return (
+            cells is not None and bool(location) and 0 < top_n <= cells.depth
+            and near is None and not w_match and (w_rating, w_votes) == cells.weights
+        )
+
+    @_reads
+    def similar_to(self, restaurant_name: str, top_n: int = 5) -> pd.DataFrame:
+        """
+        Restaurants most like `restaurant_name` in cuisines, cost, rating
+        and votes, and area, best first, with a 'Similarity' column.
+        The name is matched case-insensitively; for chains the outlet with
+        the most votes is the reference and other outlets are left out.
+        """
+        if self._similarity_mode is None:
+            raise ValueError("Similarity search is disabled for this recommender (similarity=None)")
+        if self._similarity is None:
+            self._similarity = self._build_similarity()
+
+        if self._name_lookup is None:
+            names = self.data['Restaurant Name'].cat
+            lowered = pd.factorize(names.categories.str.lower().str.strip())[0]
+            codes = names.codes.to_numpy()
+            rows = np.flatnonzero(codes >= 0)
+            keys = lowered[codes[rows]]
+            order = np.argsort(keys, kind='stable')
+            groups = np.split(rows[order], np.flatnonzero(np.diff(keys[order])) + 1)
+            self._name_lookup = {
+                str(names.categories[codes[group[0]]]).lower().strip(): group for group in groups if group.size
+            }
+        same_name = self._name_lookup.get(restaurant_name.strip().lower(), np.empty(0, dtype=np.intp))
+        outlets = same_name[self._alive[same_name]]
+        if outlets.size == 0:
+            raise ValueError(f"Unknown restaurant: '{restaurant_name}'")
+        reference = outlets[np.argmax(np.nan_to_num(self._votes[outlets], nan=-1.0))]
+
+        # Visit rows from the most similar groups down; once the top_n-th
+        # best beats anything later rows can reach, the ranking is final
+        candidates, scores, found = [], [], 0
+        for rows, batch_scores, bound in self._similarity.batches(reference):
+            keep = self._alive[rows]
+            if same_name.size:
+                keep &= ~np.isin(rows, same_name)
+            candidates.append(rows[keep])
+            scores.append(batch_scores[keep])
+            found += int(keep.sum())
+            if found >= top_n and (top_n <= 0 or bound + 1e-6 < np.partition(
+                np.concatenate(scores), found - top_n
+            )[found - top_n]):
+                break
+        candidates = np.concatenate(candidates) if candidates else np.empty(0, dtype=np.intp)
+        scores = np.concatenate(scores) if scores else np.empty(0, dtype=np.float32)
+        top = self._top(candidates, scores, top_n)
+        rows, scores = candidates[top], scores[top]
+
+        result = self._decode(self.data.iloc[rows][self._available_columns()])
+        result['Similarity'] = scores
+        return result
+
+    @_reads
+    def vocabularies(self) -> Dict[str, List[str]]:
+        """
+        Sorted, title-cased cities and cuisines that live restaurants
+        have, for building pickers; lower-cased they are valid `location`
+        and `cuisines` values. Computed once and reset when data changes;
+        treat the lists as read-only.
+        """
+        if self._vocabularies is None:
+            self._vocabularies = {
+                'cities': sorted(
+                    city.title() for city, rows in zip(self._cities, self._city_index) if rows.size
+                ),
+                'cuisines': sorted(
+                    token.title() for token, rows in zip(self._tokens, self._token_index) if rows.size
+                ),
+            }
+        return self._vocabularies
+
+    def _cache_key(
+        self,
+        cuisines: Optional[List[str]],
+        budget_range: Optional[Tuple[str, str]],
+        location: Optional[str],
+        top_n: int,
+        w_rating: float,
+        w_votes: float,
+        near: Optional[Tuple[float, float]],
+        radius_km: float,
+        w_distance: float,
+        explain: bool,
+        w_match: float = 0.0,
+        ranges: tuple = ()
+    ) -> tuple:
+        cuisine_key, budget_key, _ = self._query_key(cuisines, budget_range, None)
+        resolved = tuple(sorted(self._resolve_location(location))) if location else None
+        proximity = None if near is None else (float(near[0]), float(near[1]), radius_km, w_distance)
+        # The explanation echoes the query as typed, so it is part of the key too
+        prefix = self._explain_prefix(cuisines, budget_range, location) if explain else None
+        return (
+            cuisine_key, budget_key, resolved, top_n, (w_rating, w_votes, w_match), proximity, ranges, prefix
+        )
+
+    def cache_info(self) -> dict:
+        """
+        Hit/miss counters and current occupancy of the result cache.
+        """
+        return self._cache.info()
+
+    def clear_cache(self):
+        """
+        Drop all cached results and reset the counters. Called whenever
+        the underlying data changes.
+        """
+        self._cache.clear()
+
+    @staticmethod
+    def _writable(array: np.ndarray) -> np.ndarray:
+        # Snapshot arrays may be read-only memory maps; copy before writing
+        return array if array.flags.writeable else array.copy()
+
+    @staticmethod
+    def _move_postings(
+        postings: List[np.ndarray],
+        old_rows: np.ndarray,
+        old_codes: np.ndarray,
+        new_rows: np.ndarray,
+        new_codes: np.ndarray,
+        n_codes: int
+    ):
+        # Patch only the posting lists whose members changed
+        while len(postings) < n_codes:
+            postings.append(np.empty(0, dtype=np.intp))
+        old_rows, old_codes = old_rows[old_codes >= 0], old_codes[old_codes >= 0]
+        new_rows, new_codes = new_rows[new_codes >= 0], new_codes[new_codes >= 0]
+        # A (row, code) pair on both sides stays where it is
+        old_keys = old_rows.astype(np.int64) * n_codes + old_codes
+        new_keys = new_rows.astype(np.int64) * n_codes + new_codes
+        kept = np.intersect1d(old_keys, new_keys)
+        leaving = ~np.isin(old_keys, kept)
+        joining = ~np.isin(new_keys, kept)
+        old_rows, old_codes = old_rows[leaving], old_codes[leaving]
+        new_rows, new_codes = new_rows[joining], new_codes[joining]
+
+        # Lists are sorted, so rows leave and join by binary search
+        for code in np.unique(old_codes):
+            current = postings[code]
+            rows = old_rows[old_codes == code]
+            at = np.searchsorted(current, rows)
+            found = at < current.size
+            found[found] = current[at[found]] == rows[found]
+            postings[code] = np.delete(current, at[found])
+        for code in np.unique(new_codes):
+            current = postings[code]
+            rows = np.unique(new_rows[new_codes == code])
+            postings[code] = np.insert(current, np.searchsorted(current, rows), rows)
+
+    def _token_codes(self, tokens: np.ndarray) -> np.ndarray:
+        # Codes for cuisine tokens, appending unseen tokens to the vocabulary
+        for token in tokens:
+            if token not in self._token_lookup:
+                self._token_lookup[token] = len(self._tokens)
+                self._tokens.append(token)
+        return np.array([self._token_lookup[token] for token in tokens], dtype=np.intp)
+
+    def upsert(self, rows: pd.DataFrame) -> int:
+        """
+        Insert or update restaurants without rebuilding the recommender.
+        Rows are matched on index label: a label already present updates
+        that restaurant, changing only the columns given (a frame of just
+        Rating and Votes is a valid live update); other labels are
+        appended and must carry every required column except coordinates.
+        Queries in other threads finish before the update starts and
+        later ones see all of it. Returns the number of rows written.
+        """
+        written = self._upsert(rows)
+        self._refresh_cells()
+        return written
+
+    @_writes
+    def _upsert(self, rows: pd.DataFrame) -> int:
+        if rows.empty:
+            return 0
+        if not self.data.index.is_unique or not rows.index.is_unique:
+            raise ValueError("upsert matches rows on index labels, which must be unique")
+
+        rows = rows[[col for col in rows.columns if col in self.data.columns]].copy()
+        # The index's hash table is already built, unlike a fresh isin scan
+        positions = self.data.index.get_indexer(rows.index)
+        is_new = positions < 0
+        required = ['Restaurant Name', 'City', 'Primary Cuisine', 'Cost Category', 'Rating', 'Votes']
+        missing = [col for col in required if col not in rows.columns]
+        if is_new.any() and missing:
+            raise ValueError(f"New restaurants are missing required columns: {missing}")
+
+        # Normalize like the constructor and extend vocabularies; new
+        # categories are appended so existing codes keep their meaning
+        for col in ('City', 'Primary Cuisine', 'Cuisines', 'Cost Category'):
+            if col in rows.columns:
+                rows[col] = rows[col].str.lower().str.strip()
+        for col in ('Restaurant Name', 'City', 'Primary Cuisine', 'Cuisines'):
+            if col in rows.columns:
+                unseen = pd.Index(rows[col].dropna().unique()).difference(self.data[col].cat.categories)
+                if len(unseen):
+                    self.data[col] = self.data[col].cat.add_categories(unseen)
+        for col in ('Restaurant Name', 'City', 'Primary Cuisine', 'Cuisines', 'Cost Category'):
+            if col in rows.columns:
+                rows[col] = pd.Categorical(rows[col], categories=self.data[col].cat.categories)
+
+        code_arrays = ('_city_codes', '_cuisine_codes', '_cost_codes')
+        n_old = len(self.data)
+        updated = positions[~is_new]
+        # Removed rows sit in no posting list, so they have no old codes
+        was_alive = self._alive[updated]
+        old_codes = [np.where(was_alive, getattr(self, name)[updated], -1) for name in code_arrays]
+        # Live rating and vote updates leave the similarity groups as they are
+        rating_only = not is_new.any() and was_alive.all() and set(rows.columns) <= {'Rating', 'Votes'}
+        # Tokens only change for rows whose cuisines change or that (re)join
+        retokenize = 'Cuisines' in rows.columns or 'Primary Cuisine' in rows.columns
+        old_token_rows, old_tokens = self._tokenize(updated[was_alive] if retokenize else updated[:0])
+
+        if updated.size:
+            if self._data_readonly:
+                self.data = self.data.copy()
+                self._data_readonly = False
+            self.data.loc[rows.index[~is_new], rows.columns] = rows[~is_new]
+        if is_new.any():
+            appended_rows = rows[is_new].reindex(columns=self.data.columns)
+            # reindex fills absent columns with float NaN, which the concat
+            # would turn a categorical or string column into object with
+            for col in self.data.columns.difference(rows.columns):
+                dtype = self.data[col].dtype
+                if not pd.api.types.is_numeric_dtype(dtype):
+                    appended_rows[col] = pd.Series(None, index=appended_rows.index, dtype=dtype)
+            self.data = pd.concat([self.data, appended_rows])
+        touched = np.concatenate([updated, np.arange(n_old, len(self.data))])
+        appended = len(self.data) - n_old
+
+        self._init_codes()
+        self._init_vocabularies()
+
+        for attr, column in (
+            ('_rating', 'Rating'), ('_votes', 'Votes'),
+            ('_latitude', 'Latitude'), ('_longitude', 'Longitude'),
+        ):
+            array = getattr(self, attr)
+            values = self.data[column].iloc[touched].to_numpy(dtype=np.float32)
+            if appended:
+                array = np.concatenate([array, np.empty(appended, dtype=np.float32)])
+            array = self._writable(array)
+            array[touched] = values
+            setattr(self, attr, array)
+        for column, attr in self._numeric_columns.items():
+            self._sorted[column].update(getattr(self, attr), touched)
+
+        self._alive = self._writable(np.concatenate([self._alive, np.ones(appended, dtype=bool)]))
+        self._alive[touched] = True
+
+        for postings, name, old, n_codes in zip(
+            (self._city_index, self._cost_index),
+            ('_city_codes', '_cost_codes'),
+            (old_codes[0], old_codes[2]),
+            (len(self._cities), len(self._budget_order))
+        ):
+            old = np.concatenate([old, np.full(appended, -1, dtype=old.dtype)])
+            self._move_postings(postings, touched, old, touched, getattr(self, name)[touched], n_codes)
+
+        joined = np.concatenate([updated[~was_alive], np.arange(n_old, len(self.data))])
+        new_token_rows, new_tokens = self._tokenize(
+            np.concatenate([updated[was_alive], joined]) if retokenize else joined
+        )
+        old_token_codes = self._token_codes(old_tokens)
+        new_token_codes = self._token_codes(new_tokens)
+        self._move_postings(
+            self._token_index, old_token_rows, old_token_codes,
+            new_token_rows, new_token_codes, len(self._tokens)
+        )
+
+        self._geo_index.update(self._latitude, self._longitude, touched)
+        self._init_scores()
+        self._all_rows = np.flatnonzero(self._alive)
+        if self._similarity is not None and rating_only:
+            self._similarity.update_quality(self._rating_score, self._votes_score)
+        else:
+            self._similarity = None
+        self._cells = None
+        self.clear_cache()
+        return int(touched.size)
+
+    def remove(self, names_or_ids) -> int:
+        """
+        Remove restaurants by index label, or by Restaurant Name (every
+        live row with that name). Removed rows stay in `data` as
+        tombstones so row positions stay stable.
+        Returns the number of rows removed.
+        """
+        removed = self._remove(names_or_ids)
+        self._refresh_cells()
+        return removed
+
+    @_writes
+    def _remove(self, names_or_ids) -> int:
+        if isinstance(names_or_ids, str) or np.isscalar(names_or_ids):
+            names_or_ids = [names_or_ids]
+        labels = [item for item in names_or_ids if item in self.data.index]
+        names = [item for item in names_or_ids if isinstance(item, str) and item not in self.data.index]
+
+        mask = self.data.index.isin(labels) | self.data['Restaurant Name'].isin(names).to_numpy()
+        rows = np.flatnonzero(mask & self._alive)
+        if rows.size == 0:
+            return 0
+
+        self._alive = self._writable(self._alive)
+        self._alive[rows] = False
+        for postings, codes in (
+            (self._city_index, self._city_codes),
+            (self._cost_index, self._cost_codes),
+        ):
+            self._move_postings(postings, rows, codes[rows], rows, np.full(rows.size, -1), len(postings))
+        token_rows, tokens = self._tokenize(rows)
+        self._move_postings(
+            self._token_index, token_rows, self._token_codes(tokens),
+            rows, np.full(rows.size, -1), len(self._tokens)
+        )
+
+        # Dead rows drop out of score normalization and of proximity results
+        for attr in ('_rating', '_votes', '_latitude', '_longitude'):
+            array = self._writable(getattr(self, attr))
+            array[rows] = np.nan
+            setattr(self, attr, array)
+        for column, attr in self._numeric_columns.items():
+            self._sorted[column].update(getattr(self, attr), rows)
+        self._geo_index.update(self._latitude, self._longitude, np.empty(0, dtype=np.intp))
+
+        self._init_scores()
+        self._all_rows = np.flatnonzero(self._alive)
+        self._similarity = None
+        self._vocabularies = None
+        self._cells = None
+        self.clear_cache()
+        return int(rows.size)
+
+    def _export(self, put) -> dict:
+        # Hand every array of the snapshot to `put(name, array)`, which stores
+        # it and returns a key; returns the manifest describing them
+        def put_strings(stem: str, values) -> List[str]:
+            offsets, buffer = _encode_strings(values)
+            return [put(f'{stem}.offsets', offsets), put(f'{stem}.bytes', buffer)]
+
+        columns = []
+        for i, col in enumerate(self.data.columns):
+            series = self.data[col]
+            entry = {'name': col}
+            if isinstance(series.dtype, pd.CategoricalDtype) or not (
+                pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series)
+            ):
+                # Categorical and text columns: integer codes plus a string vocabulary
+                entry['kind'] = 'category' if isinstance(series.dtype, pd.CategoricalDtype) else 'string'
+                categorical = series if entry['kind'] == 'category' else series.astype('category')
+                entry['codes'] = put(f'col{i}.codes', categorical.cat.codes.to_numpy())
+                entry['categories'] = put_strings(f'col{i}.categories', categorical.cat.categories)
+            else:
+                entry['kind'] = 'array'
+                entry['values'] = put(f'col{i}', series.to_numpy())
+            columns.append(entry)
+
+        if pd.api.types.is_numeric_dtype(self.data.index):
+            index = {'kind': 'array', 'values': put('index', self.data.index.to_numpy())}
+        else:
+            index = {'kind': 'string', 'values': put_strings('index', self.data.index)}
+
+        arrays = {
+            'alive': self._alive,
+            'rating': self._rating, 'votes': self._votes,
+            'latitude': self._latitude, 'longitude': self._longitude,
+            'score.rating': self._rating_score, 'score.votes': self._votes_score,
+        }
+        for name, postings in (
+            ('city_index', self._city_index),
+            ('cost_index', self._cost_index),
+            ('token_index', self._token_index),
+        ):
+            # Posting lists stored back to back with their boundaries
+            arrays[f'{name}.rows'] = np.concatenate(postings) if postings else np.empty(0, dtype=np.intp)
+            arrays[f'{name}.bounds'] = np.cumsum([0] + [len(p) for p in postings])
+        for name, array in self._geo_index.state().items():
+            arrays[f'geo.{name}'] = array
+        for column, values in self._sorted.items():
+            for name, array in values.state().items():
+                arrays[f'sorted.{column}.{name}'] = array
+
+        return {
+            'version': self.SNAPSHOT_VERSION,
+            'n_rows': len(self.data),
+            'columns': columns,
+            'index': index,
+            'arrays': {name: put(name, array) for name, array in arrays.items()},
+            'tokens': put_strings('tokens', self._tokens),
+            'geo_cell_deg': self._geo_index.cell_deg,
+            'scoring': self.scoring.config(),
+        }
+
+    @classmethod
+    def _restore(
+        cls,
+        manifest: dict,
+        get,
+        readonly: bool,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None
+    ) -> 'ZomatoRecommender':
+        # Inverse of `_export`: `get(key)` returns the array stored under key
+        if manifest['version'] != cls.SNAPSHOT_VERSION:
+            raise ValueError(
+                f"Snapshot version {manifest['version']} is not supported "
+                f"(expected {cls.SNAPSHOT_VERSION})"
+            )
+
+        def get_strings(keys: List[str]) -> List[str]:
+            return _decode_strings(get(keys[0]), get(keys[1]))
+
+        data = {}
+        for entry in manifest['columns']:
+            if entry['kind'] == 'array':
+                data[entry['name']] = get(entry['values'])
+                continue
+            categories = get_strings(entry['categories'])
+            # The codes stay a view of the snapshot; `_export` wrote them valid
+            values = pd.Categorical.from_codes(get(entry['codes']), categories=categories, validate=False)
+            if entry['kind'] == 'string':
+                values = pd.Series(values).astype(values.categories.dtype).array
+            data[entry['name']] = values
+
+        index = manifest['index']
+        if index['kind'] == 'array':
+            index = pd.Index(get(index['values']))
+        else:
+            index = pd.Index(get_strings(index['values']))
+
+        self = cls.__new__(cls)
+        self._init_schema()
+        self.stats = None
+        self.data = pd.DataFrame(data, index=index, copy=False)
+        # Columns backed by read-only shared buffers; copied on the first upsert
+        self._data_readonly = readonly
+
+        arrays = {name: get(key) for name, key in manifest['arrays'].items()}
+        self._init_codes()
+        self._init_vocabularies()
+
+        self._rating = arrays['rating']
+        self._votes = arrays['votes']
+        self._latitude = arrays['latitude']
+        self._longitude = arrays['longitude']
+        self._sorted = {
+            column: _SortedColumn.from_state(
+                {name: arrays[f'sorted.{column}.{name}'] for name in ('order', 'values')}
+            )
+            for column in self._numeric_columns
+        }
+        # Custom Scoring subclasses come back as the base class with the same settings
+        self.scoring = Scoring(**manifest['scoring'])
+        self._rating_score = arrays['score.rating']
+        self._votes_score = arrays['score.votes']
+
+        def postings(name: str) -> List[np.ndarray]:
+            rows, bounds = arrays[f'{name}.rows'], arrays[f'{name}.bounds']
+            return [rows[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+
+        self._city_index = postings('city_index')
+        self._cost_index = postings('cost_index')
+        self._token_index = postings('token_index')
+        self._tokens = get_strings(manifest['tokens'])
+        self._token_lookup = {token: code for code, token in enumerate(self._tokens)}
+        self._alive = arrays['alive']
+        self._all_rows = np.flatnonzero(self._alive)
+        self._geo_index = _GeoGrid.from_state(
+            self._latitude, self._longitude, manifest['geo_cell_deg'],
+            {name: arrays[f'geo.{name}'] for name in ('rows', 'keys', 'starts', 'extra')}
+        )
+
+        # Not part of the snapshot; built on the first similar_to call
+        self._init_similarity('sparse', build=False)
+        self._init_cells()
+        self._init_cache(cache_size, cache_ttl)
+        # Queries read under it; upsert and remove write under it
+        self._lock = _ReadWriteLock()
+        return self
+
+    @_reads
+    def save(self, path: str):
+        """
+        Write a snapshot of the normalized data, encoded arrays and built
+        indexes to the directory `path` as plain .npy files plus a JSON
+        manifest. `ZomatoRecommender.load` memory-maps it back without
+        parsing CSV or rebuilding indexes.
+        """
+        os.makedirs(path, exist_ok=True)
+
+        def put(name: str, array: np.ndarray) -> str:
+            filename = f'{name}.npy'
+            np.save(os.path.join(path, filename), np.ascontiguousarray(array), allow_pickle=False)
+            return filename
+
+        manifest = self._export(put)
+        with open(os.path.join(path, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None,
+        mmap: bool = True
+    ) -> 'ZomatoRecommender':
+        """
+        Rebuild a recommender from a snapshot written by `save`. With
+        `mmap=True` the numeric arrays and indexes are memory-mapped
+        read-only, so worker processes share the page cache; category
+        vocabularies are still decoded per process, as with `attach`.
+        """
+        with open(os.path.join(path, 'manifest.json')) as f:
+            manifest = json.load(f)
+        mode = 'r' if mmap else None
+
+        def get(filename: str) -> np.ndarray:
+            return np.load(os.path.join(path, filename), mmap_mode=mode, allow_pickle=False)
+
+        return cls._restore(manifest, get, mmap, cache_size, cache_ttl)
+
+    @_reads
+    def share(self) -> 'SharedSnapshot':
+        """
+        Copy the snapshot arrays into one `multiprocessing.shared_memory`
+        block and return a picklable handle to it. Worker processes pass
+        the handle to `ZomatoRecommender.attach` to get a recommender over
+        read-only views of that block. The creating process owns the block
+        and must call `unlink()` on the handle once workers are done.
+        """
+        arrays: Dict[str, np.ndarray] = {}
+
+        def put(name: str, array: np.ndarray) -> str:
+            arrays[name] = np.ascontiguousarray(array)
+            return name
+
+        manifest = self._export(put)
+
+        # Lay arrays out back to back, each aligned for its dtype
+        layout = {}
+        size = 0
+        for name, array in arrays.items():
+            size = -(-size // SharedSnapshot.ALIGN) * SharedSnapshot.ALIGN
+            layout[name] = (size, array.dtype.str, array.shape)
+            size += array.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for name, array in arrays.items():
+            offset, _, _ = layout[name]
+            block.buf[offset:offset + array.nbytes] = array.view(np.uint8).reshape(-1)
+        return SharedSnapshot(block, manifest, layout)
+
+    @classmethod
+    def attach(
+        cls,
+        snapshot: 'SharedSnapshot',
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None
+    ) -> 'ZomatoRecommender':
+        """
+        Recommender over read-only views of a block created by `share`.
+        Updates made with `upsert`/`remove` copy what they touch and stay
+        local to this process.
+
+        Numeric arrays, indexes and category codes are not copied, but each
+        process decodes the category vocabularies into Python strings. That
+        is dominated by restaurant names, about 110 bytes of private memory
+        per distinct name (roughly 85 MB at 1M rows), and it is paid once
+        per attaching process.
+        """
+        block = snapshot.block()
+
+        def get(name: str) -> np.ndarray:
+            offset, dtype, shape = snapshot.layout[name]
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+            view.flags.writeable = False
+            return view
+
+        self = cls._restore(snapshot.manifest, get, True, cache_size, cache_ttl)
+        # Views point into the block, so keep it mapped as long as we live
+        self._shared_block = block
+        return self
+
+    def _rank_groups(self, parsed: List[dict]):
+        """
+        Filter and rank `parsed` queries once per shared filter key. Yields
+        (members, ranked) per group, where `ranked` is None when nothing
+        matched, else a dict of the group's candidate rows, scores,
+        distances, match counts, relaxed level, radius and ranked
+        positions (for the largest top_n in the group).
+        """
+        stats = self.stats
+        if stats is not None:
+            t = stats.clock()
+
+        # Scores depend only on the row, so score the whole table once per weighting
+        every_row = np.arange(len(self.data))
+        all_scores: Dict[tuple, np.ndarray] = {}
+        groups: Dict[tuple, List[int]] = {}
+        for i, q in enumerate(parsed):
+            if q['weights'] not in all_scores:
+                all_scores[q['weights']] = self._score(every_row, *q['weights'])
+            key = self._query_key(q['cuisines'], q['budget_range'], q['location'])
+            groups.setdefault(key + (q['weights'], q['proximity'], q['w_match'], q['ranges']), []).append(i)
+        if stats is not None:
+            stats.lap('batch_score', t)
+
+        for members in groups.values():
+            first = parsed[members[0]]
+            if stats is not None:
+                t = stats.clock()
+            near, radius_km, w_distance = first['proximity'] or (None, None, 0.0)
+            within, within_dist = self._proximity(near, radius_km)
+            if stats is not None and near is not None:
+                t = stats.lap('proximity', t)
+                stats.rows('proximity', within.size)
+            filtered, relaxed, term_rows = self._candidates(
+                first['cuisines'], first['budget_range'], first['location'], within, first['ranges']
+            )
+            if stats is not None:
+                t = stats.lap('filter', t)
+            if filtered.size == 0:
+                yield members, None
+                continue
+
+            # Rank once for the largest top_n in the group; callers slice per query
+            scores = all_scores[first['weights']][filtered]
+            matches = self._match_counts(filtered, term_rows) if first['cuisines'] else None
+            if matches is not None:
+                scores = self._blend_matches(scores, matches, len(term_rows), first['w_match'])
+            distances = None
+            if near is not None:
+                distances = within_dist[np.searchsorted(within, filtered)]
+                scores = self._blend_distance(scores, distances, radius_km, w_distance)
+            top = self._top(filtered, scores, max(parsed[i]['top_n'] for i in members))
+            if stats is not None:
+                stats.lap('rank', t)
+            yield members, {
+                'rows': filtered, 'scores': scores, 'distances': distances,
+                'matches': matches, 'relaxed': relaxed, 'radius_km': radius_km, 'top': top,
+            }
+
+    @_reads
+    def recommend_batch(self, queries) -> List[pd.DataFrame]:
+        """
+        Answer many queries in one call. `queries` is a list of dicts (or
+        tuples in argument order) or a DataFrame with columns cuisines,
+        budget_range, location and optionally top_n, w_rating, w_votes,
+        near, radius_km, w_distance, explain, w_match, min_rating,
+        min_votes and ranges. Queries sharing a filter key are
+        filtered and ranked once; each result matches what `recommend`
+        returns for that query.
+        """
+        parsed = self._parse_queries(queries)
+        stats = self.stats
+        if stats is not None:
+            start = stats.clock()
+
+        results: List[pd.DataFrame] = [None] * len(parsed)
+        answered, answers = [], []
+        for members, ranked in self._rank_groups(parsed):
+            if ranked is None:
+                # Members share the proximity part of the key
+                near = (parsed[members[0]]['proximity'] or (None,))[0]
+                for i in members:
+                    results[i] = self._empty_result(near, parsed[i]['cuisines'])
+                continue
+            for i in members:
+                q = parsed[i]
+                head = ranked['top'][:q['top_n']]
+                answered.append(i)
+                answers.append({
+                    'rows': ranked['rows'][head], 'scores': ranked['scores'][head],
+                    'cuisines': q['cuisines'], 'budget_range': q['budget_range'], 'location': q['location'],
+                    'distances': None if ranked['distances'] is None else ranked['distances'][head],
+                    'radius_km': ranked['radius_km'], 'relaxed': ranked['relaxed'], 'explain': q['explain'],
+                    'matches': None if ranked['matches'] is None else ranked['matches'][head],
+                    'ranges': q['ranges'],
+                })
+        # Build every non-empty result frame in one pass
+        if answers:
+            for i, result in zip(answered, self._results(answers)):
+                results[i] = result
+
+        if stats is not None:
+            stats.lap('batch_total', start)
+        return results
+
+    @_reads
+    def rank_batch(self, queries) -> List[np.ndarray]:
+        """
+        Like `recommend_batch` but returns only the ranked index labels of
+        each result, skipping DataFrame construction. Meant for offline
+        evaluation over many queries.
+        """
+        parsed = self._parse_queries(queries)
+        results: List[np.ndarray] = [None] * len(parsed)
+        for members, ranked in self._rank_groups(parsed):
+            for i in members:
+                if ranked is None:
+                    results[i] = self.data.index[:0].to_numpy()
+                else:
+                    head = ranked['top'][:parsed[i]['top_n']]
+                    results[i] = self.data.index[ranked['rows'][head]].to_numpy()
+        return results
+
+    def _parse_queries(self, queries) -> List[dict]:
+        fields = (
+            'cuisines', 'budget_range', 'location', 'top_n',
+            'w_rating', 'w_votes', 'near', 'radius_km', 'w_distance', 'explain', 'w_match',
+            'min_rating', 'min_votes', 'ranges'
+        )
+        if isinstance(queries, pd.DataFrame):
+            queries = queries.to_dict('records')
+
+        parsed = []
+        for q in queries:
+            if not isinstance(q, dict):
+                if len(q) > len(fields):
+                    raise ValueError(f"A query tuple takes at most {len(fields)} arguments, got {len(q)}")
+                q = dict(zip(fields, q))
+            unknown = [key for key in q if key not in fields]
+            if unknown:
+                # recommend() would reject these too; a typo must not fall back to defaults
+                raise ValueError(f"Unknown query arguments: {unknown}")
+
+            def get(field: str, default=None):
+                # DataFrame inputs carry fields a row leaves empty as NaN
+                value = q.get(field, default)
+                if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+                    return default
+                return value
 
-    filter_and_rank = recommend
\ No newline at end of file
+            location = get('location')
+            near = get('near')
+            ranges = get('ranges')
+            proximity = None
+            if isinstance(near, (tuple, list, np.ndarray)):
+                proximity = (
+                    (float(near[0]), float(near[1])),
+                    float(get('radius_km', 5.0)),
+                    float(get('w_distance', 0.0))
+                )
+            parsed.append({
+                'cuisines': get('cuisines'),
+                'budget_range': get('budget_range'),
+                'location': location if isinstance(location, str) else None,
+                'top_n': int(get('top_n', 5)),
+                'weights': (get('w_rating', 0.7), get('w_votes', 0.3)),
+                'proximity': proximity,
+                'explain': bool(get('explain', True)),
+                'w_match': float(get('w_match', 0.0)),
+                'ranges': self._ranges(
+                    get('min_rating'), get('min_votes'),
+                    ranges if isinstance(ranges, dict) else None
+                ),
+            })
+        return parsed
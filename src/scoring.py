@@ -0,0 +1,154 @@
+import copy
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Tuple
+
+
+class Scoring:
+    """
+    Static part of the recommender's score. At construction the
+    recommender asks it for two per-restaurant components in [0, 1], a
+    rating signal and a votes signal; queries only blend them with
+    `w_rating` and `w_votes`.
+
+    rating: 'raw' (Rating as is) or 'bayesian' (Rating shrunk towards the
+        mean rating by `prior_votes` pseudo-votes, so a 5.0 from three
+        votes no longer beats a 4.6 from three thousand).
+    votes: 'raw' or 'log' (log1p, which tames the heavy skew of votes).
+    normalize: 'global' min-max scaling, or 'city' to scale each signal
+        within the restaurant's city.
+
+    The defaults reproduce the original min-max ranking. Subclass and
+    override `rating_signal`, `votes_signal` or `normalize_signal` to plug
+    in other static signals. `freeze` pins the statistics taken from the
+    data (`population`), so subsets of a catalog score like the whole.
+    """
+
+    RATINGS = ('raw', 'bayesian')
+    VOTES = ('raw', 'log')
+    NORMALIZATIONS = ('global', 'city')
+
+    def __init__(
+        self,
+        rating: str = 'raw',
+        votes: str = 'raw',
+        normalize: str = 'global',
+        prior_votes: Optional[float] = None,
+        population: Optional[dict] = None
+    ):
+        if rating not in self.RATINGS:
+            raise ValueError(f"rating must be one of {list(self.RATINGS)}")
+        if votes not in self.VOTES:
+            raise ValueError(f"votes must be one of {list(self.VOTES)}")
+        if normalize not in self.NORMALIZATIONS:
+            raise ValueError(f"normalize must be one of {list(self.NORMALIZATIONS)}")
+        if prior_votes is not None and prior_votes < 0:
+            raise ValueError("prior_votes cannot be negative")
+        self.rating = rating
+        self.votes = votes
+        self.normalize = normalize
+        self.prior_votes = prior_votes
+        # Catalog-wide mean rating and signal ranges set by `freeze`;
+        # None derives them from whatever data is being scored
+        self.population = population
+
+    def freeze(self, rating: np.ndarray, votes: np.ndarray) -> 'Scoring':
+        """
+        A copy with everything this Scoring would derive from `rating` and
+        `votes` (the prior, the mean rating and the global signal ranges)
+        fixed, so scoring any subset of those rows gives each row exactly
+        the components it gets when all are scored together. City
+        normalization needs nothing pinned while no city is split.
+        """
+        frozen = copy.copy(self)
+        frozen.population = {}
+        if self.rating == 'bayesian':
+            if frozen.prior_votes is None:
+                frozen.prior_votes = float(np.nanmedian(votes)) if np.isfinite(votes).any() else 0.0
+            frozen.population['rating_mean'] = float(np.nanmean(rating)) if np.isfinite(rating).any() else 0.0
+        if self.normalize == 'global':
+            for name, values in (
+                ('rating', frozen.rating_signal(rating, votes)),
+                ('votes', frozen.votes_signal(votes)),
+            ):
+                finite = np.isfinite(values).any()
+                frozen.population[f'{name}_range'] = (
+                    [float(np.nanmin(values)), float(np.nanmax(values))] if finite else None
+                )
+        return frozen
+
+    def config(self) -> dict:
+        # Enough to rebuild an equivalent Scoring, e.g. from a snapshot manifest
+        return {
+            'rating': self.rating,
+            'votes': self.votes,
+            'normalize': self.normalize,
+            'prior_votes': self.prior_votes,
+            'population': self.population,
+        }
+
+    def rating_signal(self, rating: np.ndarray, votes: np.ndarray) -> np.ndarray:
+        if self.rating == 'raw':
+            return rating
+        # Bayesian average: v/(v+m) * R + m/(v+m) * C
+        prior = self.prior_votes
+        if prior is None:
+            prior = float(np.nanmedian(votes)) if np.isfinite(votes).any() else 0.0
+        if self.population and 'rating_mean' in self.population:
+            mean = self.population['rating_mean']
+        else:
+            mean = float(np.nanmean(rating)) if np.isfinite(rating).any() else 0.0
+        weight = votes + prior
+        shrunk = (votes * rating + prior * mean) / np.where(weight > 0, weight, 1)
+        return np.where(weight > 0, shrunk, rating).astype(np.float32)
+
+    def votes_signal(self, votes: np.ndarray) -> np.ndarray:
+        if self.votes == 'raw':
+            return votes
+        return np.log1p(np.maximum(votes, 0)).astype(np.float32)
+
+    def normalize_signal(
+        self,
+        values: np.ndarray,
+        city_codes: np.ndarray,
+        signal: Optional[str] = None
+    ) -> np.ndarray:
+        """
+        Min-max scale `values` into [0, 1], globally or per city. A group
+        with no spread scores 0.5; NaN (removed rows) stays NaN. `signal`
+        ('rating' or 'votes') selects a frozen global range.
+        """
+        if self.normalize == 'global':
+            if self.population and f'{signal}_range' in self.population:
+                bounds = self.population[f'{signal}_range']
+            elif np.isfinite(values).any():
+                bounds = (float(np.nanmin(values)), float(np.nanmax(values)))
+            else:
+                bounds = None
+            if bounds is None:
+                return np.full(len(values), np.nan, dtype=np.float32)
+            low, high = bounds
+            if (high - low) < 1e-6:
+                return np.where(np.isnan(values), np.nan, 0.5).astype(np.float32)
+            return (values - low) / (high - low)
+
+        grouped = pd.Series(values).groupby(city_codes)
+        low = grouped.transform('min').to_numpy(dtype=np.float32)
+        high = grouped.transform('max').to_numpy(dtype=np.float32)
+        spread = high - low
+        scaled = (values - low) / np.where(spread >= 1e-6, spread, 1)
+        return np.where(spread >= 1e-6, scaled, np.where(np.isnan(values), np.nan, 0.5)).astype(np.float32)
+
+    def static_scores(
+        self,
+        rating: np.ndarray,
+        votes: np.ndarray,
+        city_codes: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The precomputed (rating, votes) components for every row.
+        """
+        rating_component = self.normalize_signal(self.rating_signal(rating, votes), city_codes, 'rating')
+        votes_component = self.normalize_signal(self.votes_signal(votes), city_codes, 'votes')
+        return rating_component.astype(np.float32), votes_component.astype(np.float32)
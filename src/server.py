@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import functools
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.recommender import SharedSnapshot, ZomatoRecommender
+
+
+# Recommender used by worker processes; set once per process by `_init_worker`
+_recommender: Optional[ZomatoRecommender] = None
+
+MAX_BODY_BYTES = 1 << 20
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+def _init_worker(
+    snapshot: Optional[str] = None,
+    shared: Optional[SharedSnapshot] = None,
+    cache_size: int = 0
+):
+    # Worker processes attach to shared memory or memory-map a snapshot
+    # directory; threads are handed their server's recommender instead
+    global _recommender
+    if shared is not None:
+        _recommender = ZomatoRecommender.attach(shared, cache_size=cache_size)
+    else:
+        _recommender = ZomatoRecommender.load(snapshot, cache_size=cache_size)
+
+
+def _in_worker(func, *args):
+    # Runs in a worker process: apply `func` to that process's recommender
+    return func(_recommender, *args)
+
+
+def _query_args(query: dict) -> dict:
+    # JSON has no tuples; budget_range and near arrive as lists
+    args = dict(query)
+    for key in ('budget_range', 'near'):
+        if isinstance(args.get(key), list):
+            args[key] = tuple(args[key])
+    return args
+
+
+def _records(result: pd.DataFrame) -> list:
+    # NaN becomes null; done in the worker so the event loop never touches pandas
+    return json.loads(result.to_json(orient='records', force_ascii=False))
+
+
+def _run_query(recommender: ZomatoRecommender, query: dict) -> list:
+    return _records(recommender.recommend(**_query_args(query)))
+
+
+def _run_batch(recommender: ZomatoRecommender, queries: List[dict]) -> List[list]:
+    results = recommender.recommend_batch([_query_args(q) for q in queries])
+    return [_records(result) for result in results]
+
+
+class RecommendServer:
+    """
+    Minimal asyncio HTTP/1.1 server in front of one shared recommender.
+    Endpoints: GET /health, POST /recommend (one query as a JSON object
+    of `recommend` arguments) and POST /recommend/batch ({"queries": [...]}).
+    Work runs on a thread or process pool; identical queries arriving
+    while one is in flight share its result.
+    """
+
+    def __init__(
+        self,
+        recommender: ZomatoRecommender,
+        workers: int = 4,
+        executor: str = 'thread',
+        snapshot: Optional[str] = None
+    ):
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor must be 'thread' or 'process'")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self.recommender = recommender
+        self.workers = workers
+        self.executor_kind = executor
+        self._snapshot = snapshot
+        self._shared: Optional[SharedSnapshot] = None
+        self._executor: Optional[Executor] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.stats = {'requests': 0, 'coalesced': 0, 'errors': 0}
+
+    def _start_executor(self) -> Executor:
+        if self.executor_kind == 'thread':
+            return ThreadPoolExecutor(self.workers)
+        # Worker processes map one copy of the arrays (a snapshot directory
+        # if given, else shared memory) instead of each building their own
+        if self._snapshot is None:
+            self._shared = self.recommender.share()
+        return ProcessPoolExecutor(
+            self.workers, initializer=_init_worker,
+            initargs=(self._snapshot, self._shared, self.recommender.cache_info()['maxsize'])
+        )
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8000) -> Tuple[str, int]:
+        """
+        Start the pool and begin listening. Returns the bound (host, port),
+        so `port=0` picks a free port.
+        """
+        self._executor = self._start_executor()
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Idle keep-alive connections would otherwise outlive the server
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._shared is not None:
+            self._shared.unlink()
+            self._shared = None
+
+    async def serve_forever(self, host: str = '127.0.0.1', port: int = 8000):
+        bound = await self.start(host, port)
+        print(f"Serving on http://{bound[0]}:{bound[1]} ({self.workers} {self.executor_kind} workers)")
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def _submit(self, func, *args):
+        # Threads get this server's recommender bound in, so several servers
+        # can share a process; worker processes each hold their own copy
+        loop = asyncio.get_running_loop()
+        if self.executor_kind == 'thread':
+            return await loop.run_in_executor(self._executor, functools.partial(func, self.recommender), *args)
+        return await loop.run_in_executor(self._executor, _in_worker, func, *args)
+
+    async def recommend(self, query: dict) -> list:
+        """
+        Answer one query, coalescing with an identical query in flight.
+        """
+        key = json.dumps(query, sort_keys=True)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.ensure_future(self._submit(_run_query, query))
+        self._inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            # Only queries arriving while this one runs share it
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    async def recommend_batch(self, queries: List[dict]) -> List[list]:
+        return await self._submit(_run_batch, queries)
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, object]:
+        if path == '/health':
+            if method != 'GET':
+                return 405, {'error': 'use GET'}
+            return 200, {'status': 'ok', 'rows': int(len(self.recommender.data)), **self.stats}
+        if path not in ('/recommend', '/recommend/batch'):
+            return 404, {'error': f'no route for {path}'}
+        if method != 'POST':
+            return 405, {'error': 'use POST'}
+
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            return 400, {'error': 'body is not valid JSON'}
+
+        if path == '/recommend':
+            if not isinstance(payload, dict):
+                return 400, {'error': 'expected a JSON object of recommend arguments'}
+            return 200, {'results': await self.recommend(payload)}
+
+        queries = payload.get('queries') if isinstance(payload, dict) else None
+        if not isinstance(queries, list) or not all(isinstance(q, dict) for q in queries):
+            return 400, {'error': 'expected {"queries": [ {...}, ... ]}'}
+        return 200, {'results': await self.recommend_batch(queries)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # One connection; requests are served in order while it stays alive
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin1').split()
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'malformed request line'}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body's extent is unknown, so the connection cannot be reused
+                    await self._respond(writer, 400, {'error': 'invalid Content-Length'}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'request body too large'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                self.stats['requests'] += 1
+                try:
+                    status, payload = await self._route(method, target.split('?', 1)[0], body)
+                except (ValueError, TypeError, KeyError) as e:
+                    # Bad query arguments surface from recommend as these
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': f'{type(e).__name__}: {e}'}
+                if status >= 400:
+                    self.stats['errors'] += 1
+
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer: asyncio.StreamWriter, status: int, payload, keep_alive: bool):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode('latin1') + body)
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve restaurant recommendations over HTTP.")
+    parser.add_argument('--data', default='data/cleaned_zomato.csv', help="cleaned CSV to load")
+    parser.add_argument('--snapshot', help="snapshot directory written by ZomatoRecommender.save (loaded instead of --data)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4)
+    parser.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    parser.add_argument('--cache-size', type=int, default=1024, help="result cache entries per recommender")
+    args = parser.parse_args(argv)
+
+    if args.snapshot:
+        recommender = ZomatoRecommender.load(args.snapshot, cache_size=args.cache_size)
+    else:
+        recommender = ZomatoRecommender(pd.read_csv(args.data), cache_size=args.cache_size)
+
+    server = RecommendServer(recommender, args.workers, args.executor, args.snapshot)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.caching import ResultCache
+from src.loadgen import sample_queries
+from src.recommender import SharedSnapshot, ZomatoRecommender, _CityResolver
+from src.scoring import Scoring
+
+
+# Fallback levels in the order `ZomatoRecommender` tries them
+_RELAXED = ('none', 'cuisine', 'budget', 'location')
+
+# The shard a worker process serves; set once per worker by `_init_shard`
+_shard = None
+
+
+def _share_resolver(recommender: ZomatoRecommender, cities: List[str]) -> ZomatoRecommender:
+    # Resolve locations against every shard's cities, so a fuzzy location
+    # means the same cities on each shard; a shard keeps the ones it holds
+    recommender._city_resolver = _CityResolver(cities)
+    return recommender
+
+
+def _init_shard(snapshot: SharedSnapshot, cities: List[str]):
+    global _shard
+    _shard = _share_resolver(ZomatoRecommender.attach(snapshot), cities)
+
+
+def _shard_batch(queries: List[dict]) -> List[pd.DataFrame]:
+    # Runs in a shard's worker process
+    return _shard.recommend_batch(queries)
+
+
+class ShardedRecommender:
+    """
+    Restaurants partitioned by country (or city when the data has no
+    Country column) into independent `ZomatoRecommender` shards, balanced
+    by row count. A query naming a location goes only to the shards
+    holding the cities it resolves to; other queries are scattered to
+    every shard and the per-shard top lists merged into a global top-k.
+
+    Results match a single recommender over the same data: shards share
+    one frozen score scale (see `Scoring.freeze`) and one city resolver,
+    fallbacks are decided across shards, and ties break on votes, name
+    and original row order.
+
+    `processes=True` runs each shard in its own worker process, attached
+    to the shard's arrays in shared memory; a local stand-in for shards
+    on separate machines. Call `close()` (or use `with`) to stop them.
+    `cache_size` keeps an LRU of merged results in front of the shards,
+    expiring entries after `cache_ttl` seconds when given.
+    Shards are read-only; rebuild to pick up data changes.
+    """
+
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        n_shards: int = 4,
+        shard_by: Optional[str] = None,
+        processes: bool = False,
+        scoring: Optional[Scoring] = None,
+        cache_size: int = 0,
+        cache_ttl: Optional[float] = None
+    ):
+        if n_shards < 1:
+            raise ValueError("n_shards must be at least 1")
+        if not data.index.is_unique:
+            raise ValueError("Sharding needs unique index labels to merge results")
+        shard_by = shard_by or ('Country' if 'Country' in data.columns else 'City')
+        if shard_by not in data.columns:
+            raise ValueError(f"Cannot shard by missing column '{shard_by}'")
+
+        # Partition keys, biggest first, each onto the currently smallest shard
+        keys = data[shard_by].astype(str).str.lower().str.strip()
+        sizes = np.zeros(n_shards, dtype=np.int64)
+        placement: Dict[str, int] = {}
+        for key, count in keys.value_counts().items():
+            placement[key] = int(np.argmin(sizes))
+            sizes[placement[key]] += count
+        # Fewer keys than shards leaves some empty; number the rest densely
+        renumber = {int(shard): i for i, shard in enumerate(np.flatnonzero(sizes))}
+        shard_of_row = keys.map({key: renumber[shard] for key, shard in placement.items()}).to_numpy()
+
+        # One score scale for every shard: freeze the statistics of the whole catalog
+        rating = data['Rating'].to_numpy(dtype=np.float32)
+        votes = data['Votes'].to_numpy(dtype=np.float32)
+        self.scoring = (scoring if scoring is not None else Scoring()).freeze(rating, votes)
+
+        # Locations resolve against every city, exactly as one recommender would
+        cities = data['City'].str.lower().str.strip()
+        self._cities = list(pd.Categorical(cities).categories)
+        self._resolver = _CityResolver(self._cities)
+        self._city_shards: Dict[str, List[int]] = {}
+        for city, shard in pd.DataFrame({'city': cities, 'shard': shard_of_row}).drop_duplicates().dropna().values:
+            self._city_shards.setdefault(city, []).append(int(shard))
+
+        self._index = data.index
+        self._shards: List[ZomatoRecommender] = []
+        self._snapshots: List[SharedSnapshot] = []
+        self._executors: List[ProcessPoolExecutor] = []
+        for shard in range(len(renumber)):
+            part = data[shard_of_row == shard]
+            recommender = ZomatoRecommender(part, scoring=self.scoring)
+            if processes:
+                # The worker and this process both map the shard's shared arrays
+                snapshot = recommender.share()
+                self._snapshots.append(snapshot)
+                self._executors.append(ProcessPoolExecutor(
+                    1, initializer=_init_shard, initargs=(snapshot, self._cities)
+                ))
+                recommender = ZomatoRecommender.attach(snapshot)
+            self._shards.append(_share_resolver(recommender, self._cities))
+
+        # Shards only ever see batches, so finished results are cached here
+        self._cache = ResultCache(cache_size, cache_ttl)
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=True)
+        for snapshot in self._snapshots:
+            snapshot.unlink()
+        self._executors = []
+        self._snapshots = []
+
+    def __enter__(self) -> 'ShardedRecommender':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def shard_sizes(self) -> List[int]:
+        return [len(shard.data) for shard in self._shards]
+
+    def cache_info(self) -> dict:
+        """
+        Hit/miss counters and current occupancy of the result cache.
+        """
+        return self._cache.info()
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    def _cache_keys(self, queries: List[dict]) -> List[tuple]:
+        # Keyed exactly as one recommender keys its cache; every shard
+        # resolves locations the same way, so any of them can build the key
+        shard = self._shards[0]
+        keys = []
+        for q in shard._parse_queries(queries):
+            near, radius_km, w_distance = q['proximity'] or (None, None, 0.0)
+            keys.append(shard._cache_key(
+                q['cuisines'], q['budget_range'], q['location'], q['top_n'], *q['weights'],
+                near, radius_km, w_distance, q['explain'], q['w_match'], q['ranges']
+            ))
+        return keys
+
+    def _scatter(self, requests: List[Tuple[int, dict]]) -> List[pd.DataFrame]:
+        """
+        Answer (shard, query) pairs, one recommend_batch call per shard;
+        with worker processes every shard works at the same time.
+        """
+        by_shard: Dict[int, List[int]] = {}
+        for i, (shard, _) in enumerate(requests):
+            by_shard.setdefault(shard, []).append(i)
+        results: List[pd.DataFrame] = [None] * len(requests)
+        if self._executors:
+            futures = {
+                shard: self._executors[shard].submit(_shard_batch, [requests[i][1] for i in members])
+                for shard, members in by_shard.items()
+            }
+            answers = {shard: future.result() for shard, future in futures.items()}
+        else:
+            answers = {
+                shard: self._shards[shard].recommend_batch([requests[i][1] for i in members])
+                for shard, members in by_shard.items()
+            }
+        for shard, members in by_shard.items():
+            for i, frame in zip(members, answers[shard]):
+                results[i] = frame
+        return results
+
+    def _plan(self, query: dict) -> List[int]:
+        # The shards holding the cities a location resolves to, else every shard
+        location = query.get('location')
+        if not isinstance(location, str) or not location:
+            return list(range(len(self._shards)))
+        return sorted({
+            shard
+            for city in self._resolver.resolve(location.strip().lower())
+            for shard in self._city_shards.get(city, [])
+        })
+
+    def _merge(self, parts: List[pd.DataFrame], top_n: int, level: str) -> pd.DataFrame:
+        # Global top-k over shard results at one fallback level, ranked
+        # like `ZomatoRecommender._top`: score, votes, name, row order
+        parts = [part for part in parts if len(part) and part['Relaxed'].iloc[0] == level]
+        merged = pd.concat(parts) if len(parts) > 1 else parts[0]
+        _, name_rank = np.unique(merged['Restaurant Name'].to_numpy(dtype=object), return_inverse=True)
+        order = np.lexsort((
+            self._index.get_indexer(merged.index),
+            name_rank,
+            -merged['Votes'].to_numpy(dtype=np.float32),
+            -merged['Score'].to_numpy(dtype=np.float32)
+        ))
+        return merged.iloc[order[:top_n]]
+
+    @staticmethod
+    def _best_level(parts: List[pd.DataFrame]) -> Optional[str]:
+        # The least relaxed level any shard matched at; the union of the
+        # shards' candidates is empty at every level before it
+        levels = [_RELAXED.index(part['Relaxed'].iloc[0]) for part in parts if len(part)]
+        return _RELAXED[min(levels)] if levels else None
+
+    def recommend_batch(self, queries: List[dict]) -> List[pd.DataFrame]:
+        """
+        Answer many queries (dicts of `ZomatoRecommender.recommend`
+        arguments), scattering each round of shard work in one go.
+        """
+        if not self._cache.enabled:
+            return self._answer(queries)
+
+        keys = self._cache_keys(queries)
+        results: List[pd.DataFrame] = [self._cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, result in zip(missing, self._answer([queries[i] for i in missing])):
+                results[i] = result
+                self._cache.put(keys[i], result)
+        return results
+
+    def _answer(self, queries: List[dict]) -> List[pd.DataFrame]:
+        # Scatter the queries, relax locations across shards, then merge
+        plans = [self._plan(query) for query in queries]
+        answers = self._scatter([(shard, query) for query, plan in zip(queries, plans) for shard in plan])
+
+        results: List[pd.DataFrame] = [None] * len(queries)
+        parts: List[List[pd.DataFrame]] = []
+        relax_location = []
+        start = 0
+        for i, (query, plan) in enumerate(zip(queries, plans)):
+            parts.append(answers[start:start + len(plan)])
+            start += len(plan)
+            level = self._best_level(parts[i])
+            if len(plan) < len(self._shards) and level in (None, 'location'):
+                # Nothing in the location's cities matches even relaxed: the
+                # other shards hold no such city and relax the location too
+                relax_location.append(i)
+
+        if relax_location:
+            requests = [
+                (shard, queries[i])
+                for i in relax_location
+                for shard in sorted(set(range(len(self._shards))) - set(plans[i]))
+            ]
+            answers = self._scatter(requests)
+            start = 0
+            for i in relax_location:
+                n = len(self._shards) - len(plans[i])
+                parts[i] = parts[i] + answers[start:start + n]
+                start += n
+
+        for i, query in enumerate(queries):
+            level = self._best_level(parts[i])
+            if level is None:
+                results[i] = self._empty(query)
+            else:
+                results[i] = self._merge(parts[i], int(query.get('top_n', 5)), level)
+        return results
+
+    def recommend(self, **query) -> pd.DataFrame:
+        """
+        Same arguments and result as `ZomatoRecommender.recommend`.
+        """
+        return self.recommend_batch([query])[0]
+
+    def _empty(self, query: dict) -> pd.DataFrame:
+        return self._shards[0]._empty_result(query.get('near'), query.get('cuisines'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check a sharded recommender against a single one.")
+    parser.add_argument('--data', default='data/cleaned_zomato.csv')
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--processes', action='store_true', help="run each shard in a worker process")
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    data = pd.read_csv(args.data)
+    queries = sample_queries(data, args.queries, seed=args.seed)
+    # Location-free queries exercise scatter-gather
+    queries += [{k: v for k, v in q.items() if k != 'location'} for q in queries[:args.queries // 10]]
+
+    single = ZomatoRecommender(data)
+    with ShardedRecommender(data, args.shards, processes=args.processes) as sharded:
+        print(f"shards: {sharded.shard_sizes()}")
+        timings = {}
+        for name, recommender in (('single', single), ('sharded', sharded)):
+            start = time.perf_counter()
+            answers = [recommender.recommend(**query) for query in queries]
+            timings[name] = (time.perf_counter() - start) * 1000 / len(queries)
+            if name == 'single':
+                expected = answers
+        mismatches = sum(
+            not (a.index.equals(b.index) and a['Relaxed'].tolist() == b['Relaxed'].tolist())
+            for a, b in zip(expected, answers)
+        )
+    print(f"{len(queries)} queries: single {timings['single']:.2f} ms, sharded {timings['sharded']:.2f} ms per query")
+    print(f"mismatched rankings: {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
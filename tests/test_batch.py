@@ -0,0 +1,48 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.loadgen import sample_queries
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+@pytest.fixture(scope='module')
+def recommender(data) -> ZomatoRecommender:
+    return ZomatoRecommender(data)
+
+
+def test_batch_matches_a_loop(data, recommender):
+    queries = sample_queries(data, 1500, seed=0)
+    queries += [
+        {},
+        {'location': 'new dehli', 'top_n': 20},
+        {'cuisines': ['zz', 'qq'], 'location': 'nowhere'},
+        {'near': (28.63, 77.21), 'radius_km': 2.0, 'w_distance': 0.2},
+        {'location': 'agra', 'min_rating': 4.0, 'min_votes': 50, 'explain': False},
+        {'cuisines': ['cafe'], 'ranges': {'Votes': (None, 500)}, 'w_match': 0.1},
+    ]
+    for query, result in zip(queries, recommender.recommend_batch(queries)):
+        pd.testing.assert_frame_equal(result, recommender.recommend(**query))
+
+
+def test_dataframe_rows_may_leave_fields_empty(recommender):
+    queries = pd.DataFrame([{'location': 'agra'}, {'cuisines': ['thai'], 'location': 'agra', 'top_n': 3}])
+    results = recommender.recommend_batch(queries)
+    pd.testing.assert_frame_equal(results[0], recommender.recommend(location='agra'))
+    pd.testing.assert_frame_equal(results[1], recommender.recommend(cuisines=['thai'], location='agra', top_n=3))
+
+
+def test_unknown_arguments_are_rejected(recommender):
+    with pytest.raises(ValueError, match='top_k'):
+        recommender.recommend_batch([{'top_k': 3}])
+    with pytest.raises(ValueError, match='top_k'):
+        recommender.rank_batch(pd.DataFrame([{'location': 'agra', 'top_k': 3}]))
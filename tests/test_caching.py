@@ -0,0 +1,21 @@
+from src import caching
+from src.caching import ResultCache
+
+
+def test_entries_expire_and_evict_least_recent(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(caching.time, 'monotonic', lambda: now[0])
+    cache = ResultCache(maxsize=2, ttl=10)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    # 'b' was least recently used
+    assert cache.get('b') is None
+    now[0] += 11
+    assert cache.get('a') is None and cache.get('c') is None
+    assert cache.info() == {'hits': 1, 'misses': 3, 'size': 0, 'maxsize': 2, 'ttl': 10}
+
+    disabled = ResultCache()
+    disabled.put('a', 1)
+    assert not disabled.enabled and disabled.get('a') is None
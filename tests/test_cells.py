@@ -0,0 +1,79 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+BUDGETS = [None, ('low', 'low'), ('medium', 'medium'), ('high', 'high'), ('low', 'high'), ('medium', 'high')]
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+def sample_queries(data: pd.DataFrame, rng: np.random.Generator, n: int):
+    # Queries the cells cover, with filters that may exhaust a cell
+    cities = list(data['City'].str.lower().unique()) + ['new dehli', 'xyz']
+    cuisines = list(data['Primary Cuisine'].str.lower().unique()) + ['martian', 'cafe']
+    for _ in range(n):
+        query = dict(
+            location=str(rng.choice(cities)),
+            budget_range=BUDGETS[rng.integers(len(BUDGETS))],
+            top_n=int(rng.integers(1, 21))
+        )
+        picked = rng.integers(0, 3)
+        if picked:
+            query['cuisines'] = list(rng.choice(cuisines, picked))
+        if rng.random() < .2:
+            query['explain'] = False
+        u = rng.random()
+        if u < .3:
+            query['min_rating'] = float(rng.choice([1.0, 3.0, 3.5, 4.0, 4.5]))
+            query['min_votes'] = int(rng.choice([0, 50, 500]))
+        elif u < .4:
+            query['ranges'] = {'Votes': (None, float(rng.choice([10, 100, 1000])))}
+        yield query
+
+
+def compare(full: ZomatoRecommender, cells: ZomatoRecommender, queries):
+    for query in queries:
+        pd.testing.assert_frame_equal(full.recommend(**query), cells.recommend(**query))
+
+
+def test_cells_match_the_full_path(data):
+    rng = np.random.default_rng(3)
+    full = ZomatoRecommender(data)
+    cells = ZomatoRecommender(data)
+    cells.precompute(20)
+    compare(full, cells, sample_queries(data, rng, 800))
+
+    for step in range(4):
+        ids = rng.choice(data.index, 30, replace=False)
+        updates = pd.DataFrame({
+            'Rating': rng.choice([1.0, 3.0, 4.9], 30), 'Votes': rng.integers(0, 9000, 30)
+        }, index=ids)
+        new = pd.DataFrame({
+            'Restaurant Name': ['Zed', 'Yam'], 'City': ['New Delhi', 'Gotham'],
+            'Primary Cuisine': ['Martian', 'Cafe'], 'Cuisines': ['martian, cafe', 'cafe'],
+            'Cost Category': ['low', 'high'], 'Rating': [4.9, 4.2], 'Votes': [5000, 12]
+        }, index=[900000 + 2 * step, 900001 + 2 * step])
+        for recommender in (full, cells):
+            recommender.upsert(updates)
+            recommender.remove([int(ids[0])])
+            recommender.upsert(new)
+        # Rebuilt by the update itself, not by the next query
+        assert cells._cells is not None
+        compare(full, cells, sample_queries(data, rng, 200))
+
+    # Queries the cells do not cover take the full path
+    compare(full, cells, [
+        dict(location='agra', top_n=30),
+        dict(location='agra', w_rating=.5, w_votes=.5),
+        dict(cuisines=['cafe']),
+    ])
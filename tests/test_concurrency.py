@@ -0,0 +1,74 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+QUERIES = [
+    dict(top_n=10),
+    dict(cuisines=['indian'], location='new delhi', top_n=10),
+    dict(budget_range=('low', 'medium'), min_rating=3.5, top_n=20),
+    dict(near=(28.63, 77.21), radius_km=3, w_distance=.2, top_n=10),
+    dict(cuisines=['thai', 'chinese'], ranges={'Votes': (100, None)}, top_n=10),
+]
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+def test_queries_run_safely_during_upserts(data):
+    recommender = ZomatoRecommender(data)
+    name = data['Restaurant Name'].iloc[0]
+    stop = threading.Event()
+    errors = []
+
+    def read(seed: int):
+        rng = np.random.default_rng(seed)
+        try:
+            while not stop.is_set():
+                query = QUERIES[rng.integers(len(QUERIES))]
+                assert len(recommender.recommend(**query)) <= query['top_n']
+                recommender.recommend_batch(QUERIES)
+                recommender.similar_to(name, top_n=3)
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read, args=(seed,)) for seed in range(3)]
+    for reader in readers:
+        reader.start()
+    rng = np.random.default_rng(0)
+    try:
+        for step in range(300):
+            ids = rng.choice(data.index, 5, replace=False)
+            if step % 3 == 0:
+                recommender.upsert(pd.DataFrame({
+                    'Rating': rng.choice([1.0, 3.0, 4.5], 5), 'Votes': rng.integers(0, 5000, 5)
+                }, index=ids))
+            elif step % 3 == 1:
+                recommender.upsert(pd.DataFrame({
+                    'City': rng.choice(['new delhi', 'agra', 'gotham'], 5),
+                    'Primary Cuisine': rng.choice(['indian', 'thai', 'martian'], 5),
+                    'Latitude': 28.6 + rng.random(5) * .05,
+                    'Longitude': 77.2 + rng.random(5) * .05
+                }, index=ids))
+            else:
+                recommender.remove(list(ids[:2]))
+                recommender.upsert(pd.DataFrame({
+                    'Restaurant Name': [f'New {step}'], 'City': ['new delhi'],
+                    'Primary Cuisine': ['thai'], 'Cost Category': ['low'],
+                    'Rating': [4.0], 'Votes': [50]
+                }, index=[100000 + step]))
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert errors == []
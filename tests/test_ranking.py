@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+@pytest.mark.parametrize('top_n', [1, 5, 60])
+def test_missing_ratings_rank_last(data, top_n):
+    data = data.copy()
+    rng = np.random.default_rng(0)
+    data.loc[rng.choice(data.index, 50, replace=False), 'Rating'] = np.nan
+    recommender = ZomatoRecommender(data)
+
+    result = recommender.recommend(top_n=top_n)
+    assert len(result) == top_n
+    assert result['Rating'].notna().all()
+
+    # Same order as a full sort on score with NaN last, ties by votes then name
+    expected = recommender.recommend(top_n=len(data))
+    assert expected['Score'].iloc[-50:].isna().all()
+    assert result.index.equals(expected.index[:top_n])
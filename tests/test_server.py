@@ -0,0 +1,70 @@
+import asyncio
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+from src.server import RecommendServer
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+async def _request(address, head: bytes, body: bytes = b''):
+    reader, writer = await asyncio.open_connection(*address)
+    writer.write(head + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b' ', 2)[1])
+    return status, json.loads(response.split(b'\r\n\r\n', 1)[1] or b'null')
+
+
+def _post(path: str, payload) -> tuple:
+    body = json.dumps(payload).encode()
+    head = (
+        f"POST {path} HTTP/1.1\r\nConnection: close\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode()
+    return head, body
+
+
+def test_servers_in_one_process_keep_their_own_recommender(data):
+    cities = data['City'].value_counts().index[:2]
+    servers = [RecommendServer(ZomatoRecommender(data[data['City'] == city])) for city in cities]
+
+    async def run():
+        addresses = [await server.start(port=0) for server in servers]
+        try:
+            return [await _request(address, *_post('/recommend', {'top_n': 5})) for address in addresses]
+        finally:
+            for server in servers:
+                await server.stop()
+
+    for city, (status, payload) in zip(cities, asyncio.run(run())):
+        assert status == 200
+        assert {row['City'] for row in payload['results']} == {city}
+
+
+@pytest.mark.parametrize('length', ['abc', '-5'])
+def test_invalid_content_length_is_rejected(data, length):
+    server = RecommendServer(ZomatoRecommender(data.head(100)))
+
+    async def run():
+        address = await server.start(port=0)
+        try:
+            head = f"POST /recommend HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+            return await _request(address, head)
+        finally:
+            await server.stop()
+
+    status, payload = asyncio.run(run())
+    assert status == 400
+    assert 'Content-Length' in payload['error']
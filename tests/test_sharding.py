@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.loadgen import sample_queries
+from src.recommender import ZomatoRecommender
+from src.sharding import ShardedRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+@pytest.mark.parametrize('processes', [False, True])
+def test_sharded_results_match_a_single_recommender(data, processes):
+    single = ZomatoRecommender(data)
+    queries = sample_queries(data, 150, seed=1)
+    expected = [single.recommend(**query) for query in queries]
+    with ShardedRecommender(data, 4, processes=processes, cache_size=64) as sharded:
+        # The second round is served partly from the cache
+        for _ in range(2):
+            for query, result in zip(queries, sharded.recommend_batch(queries)):
+                pd.testing.assert_frame_equal(result, single.recommend(**query))
+        for query, result in zip(queries[:20], expected):
+            pd.testing.assert_frame_equal(sharded.recommend(**query), result)
+        info = sharded.cache_info()
+        assert info['hits'] > 0 and info['size'] <= 64
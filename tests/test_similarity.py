@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+def test_rating_update_patches_the_index(data):
+    rng = np.random.default_rng(0)
+    recommender = ZomatoRecommender(data)
+    index = recommender._similarity
+    ids = rng.choice(data.index, 200, replace=False)
+    recommender.upsert(pd.DataFrame({
+        'Rating': rng.choice([1.0, 3.0, 4.9], 200), 'Votes': rng.integers(0, 20000, 200)
+    }, index=ids))
+    assert recommender._similarity is index
+
+    rebuilt = ZomatoRecommender(recommender._decode(recommender.data))
+    for name in data['Restaurant Name'].sample(50, random_state=1):
+        pd.testing.assert_frame_equal(
+            recommender.similar_to(name, top_n=10), rebuilt.similar_to(name, top_n=10),
+            check_index_type=False
+        )
+
+    # Other columns can move rows between groups
+    recommender.upsert(pd.DataFrame({'Cost Category': 'High'}, index=ids[:5]))
+    assert recommender._similarity is None
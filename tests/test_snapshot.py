@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+QUERIES = [
+    dict(top_n=20),
+    dict(cuisines=['indian'], location='new delhi', top_n=10),
+    dict(budget_range=('low', 'medium'), min_rating=4.0, top_n=15),
+    dict(near=(28.63, 77.21), radius_km=3, w_distance=.2, top_n=10),
+]
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+def test_attach_shares_codes_and_answers_the_same(data):
+    recommender = ZomatoRecommender(data)
+    shared = recommender.share()
+    try:
+        attached = ZomatoRecommender.attach(shared)
+        block = np.frombuffer(attached._shared_block.buf, dtype=np.uint8)
+        for col in attached.data.columns:
+            series = attached.data[col]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                assert np.shares_memory(series.array.codes, block), col
+        for codes in (attached._city_codes, attached._cost_codes, attached._name_rank):
+            assert np.shares_memory(codes, block)
+        for query in QUERIES:
+            pd.testing.assert_frame_equal(
+                attached.recommend(**query), recommender.recommend(**query), check_dtype=False
+            )
+        del block, attached
+    finally:
+        shared.unlink()
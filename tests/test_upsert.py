@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.recommender import ZomatoRecommender
+
+
+DATA = os.path.join(os.path.dirname(__file__), '..', 'data', 'cleaned_zomato.csv')
+
+QUERIES = [
+    dict(top_n=30),
+    dict(cuisines=['indian'], location='new dehli', top_n=20),
+    dict(budget_range=('low', 'medium'), top_n=50),
+    dict(near=(28.63, 77.21), radius_km=3, w_distance=.2, top_n=15),
+    dict(location='zz city', top_n=10),
+    dict(cuisines=['martian'], top_n=5),
+    dict(location='gotham', top_n=5),
+    dict(min_rating=4.0, min_votes=100, top_n=25),
+    dict(cuisines=['indian'], ranges={'Votes': (None, 500), 'Rating': (3.0, 4.4)}, top_n=20),
+]
+
+
+@pytest.fixture(scope='module')
+def data() -> pd.DataFrame:
+    return pd.read_csv(DATA)
+
+
+def check_postings(recommender: ZomatoRecommender):
+    # Every posting list holds exactly the live rows carrying its code
+    for postings, codes in (
+        (recommender._city_index, recommender._city_codes),
+        (recommender._cost_index, recommender._cost_codes),
+    ):
+        for code, rows in enumerate(postings):
+            assert np.array_equal(rows, np.flatnonzero((codes == code) & recommender._alive))
+    token_rows, tokens = recommender._tokenize(np.flatnonzero(recommender._alive))
+    token_codes = np.array([recommender._token_lookup[token] for token in tokens], dtype=np.intp)
+    for code, rows in enumerate(recommender._token_index):
+        assert np.array_equal(rows, np.unique(token_rows[token_codes == code]))
+
+
+def check_against_rebuild(recommender: ZomatoRecommender):
+    rebuilt = ZomatoRecommender(recommender._decode(recommender.data[recommender._alive]))
+    for query in QUERIES:
+        pd.testing.assert_frame_equal(
+            recommender.recommend(**query), rebuilt.recommend(**query),
+            check_dtype=False, check_index_type=False
+        )
+
+
+def test_upsert_and_remove_match_a_rebuild(data):
+    rng = np.random.default_rng(0)
+    recommender = ZomatoRecommender(data)
+    next_id = 100000
+    for _ in range(6):
+        # Rating and vote updates
+        ids = rng.choice(recommender.data.index[recommender._alive], 20, replace=False)
+        recommender.upsert(pd.DataFrame({
+            'Rating': rng.choice([1.0, 2.5, 4.0, 5.0], 20),
+            'Votes': rng.integers(0, 20000, 20)
+        }, index=ids))
+        # Moves and cuisine changes, reviving removed rows along the way
+        ids = rng.choice(recommender.data.index, 5, replace=False)
+        recommender.upsert(pd.DataFrame({
+            'Primary Cuisine': rng.choice(['Indian', 'martian', 'thai'], 5),
+            'City': rng.choice(['Gotham', 'new delhi', 'agra'], 5),
+            'Latitude': 28.6 + rng.random(5) * .05,
+            'Longitude': 77.2 + rng.random(5) * .05
+        }, index=ids))
+        # New restaurants
+        recommender.upsert(pd.DataFrame({
+            'Restaurant Name': [f'New {next_id + i}' for i in range(3)],
+            'City': ['Zz City'] * 3,
+            'Primary Cuisine': ['Martian'] * 3,
+            'Cost Category': ['Low'] * 3,
+            'Rating': [4.5] * 3,
+            'Votes': rng.integers(0, 100, 3),
+            'Latitude': 28.62 + rng.random(3) * .02,
+            'Longitude': [77.21] * 3
+        }, index=range(next_id, next_id + 3)))
+        next_id += 3
+        recommender.remove(list(rng.choice(recommender.data.index[recommender._alive], 4, replace=False)))
+
+        check_postings(recommender)
+        check_against_rebuild(recommender)
+
+
+def test_rating_update_leaves_postings_alone(data):
+    recommender = ZomatoRecommender(data)
+    before = [rows for rows in recommender._city_index + recommender._cost_index + recommender._token_index]
+    recommender.upsert(pd.DataFrame({'Rating': 4.0, 'Votes': 10}, index=data.index[:50]))
+    after = recommender._city_index + recommender._cost_index + recommender._token_index
+    assert all(old is new for old, new in zip(before, after))
+    check_against_rebuild(recommender)
+
+
+def test_new_rows_without_optional_columns_keep_dtypes(data):
+    recommender = ZomatoRecommender(data)
+    recommender.similar_to(data['Restaurant Name'].iloc[0])
+    dtypes = recommender.data.dtypes.astype(str)
+    recommender.upsert(pd.DataFrame({
+        'Restaurant Name': ['Fresh Place'], 'City': ['New Delhi'],
+        'Primary Cuisine': ['Thai'], 'Cost Category': ['Low'],
+        'Rating': [4.2], 'Votes': [80]
+    }, index=[100000]))
+    pd.testing.assert_series_equal(recommender.data.dtypes.astype(str), dtypes)
+
+    result = recommender.similar_to('Fresh Place', top_n=5)
+    assert len(result) == 5
+    assert recommender.similar_to(data['Restaurant Name'].iloc[0]).shape[0] > 0
+    # A later upsert still finds categorical columns
+    recommender.upsert(pd.DataFrame({'Cuisines': ['Thai, Chinese']}, index=[100000]))
+    check_postings(recommender)
+    check_against_rebuild(recommender)
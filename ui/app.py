@@ -34,11 +34,19 @@ def load_data():
         return None
 
 # --- Initialize App ---
+# One recommender per process, shared by every session and rerun instead of
+# being rebuilt on each widget interaction; its result cache answers
+# repeated queries. Shared across sessions, so treat it and its results as read-only.
+@st.cache_resource
 def initialize_app():
     data = load_data()
     if data is None:
         st.stop()
-    return ZomatoRecommender(data)
+    recommender = ZomatoRecommender(data, cache_size=256)
+    # Materialize the top 20 (the largest "Number of Results") of every
+    # city/budget/cuisine combination the sidebar can ask for
+    recommender.precompute(depth=20)
+    return recommender
 
 recommender = initialize_app()
 
@@ -49,8 +57,13 @@ def display_restaurant_card(restaurant):
         with col1:
             st.subheader(restaurant['Restaurant Name'])
             
+            # Show every listed cuisine when the data carries the full list
+            cuisines = restaurant.get('Cuisines')
+            if not isinstance(cuisines, str):
+                cuisines = restaurant['Primary Cuisine']
+
             st.markdown(f"""
-            **🍽️ Cuisine:** {restaurant['Primary Cuisine'].title()}  
+            **🍽️ Cuisine:** {cuisines.title()}  
             **💰 Price Range:** {restaurant['Cost Category'].title()}  
             **⭐ Rating:** {restaurant['Rating']} ({int(restaurant['Votes'])} votes)
             """)
@@ -95,8 +108,11 @@ def main():
     with st.sidebar:
         st.header("🔍 Filter Preferences")
         
+        # Picker values are precomputed once on the shared recommender
+        vocabularies = recommender.vocabularies()
+
         # Location
-        all_locations = sorted(recommender.data['City'].str.title().unique())
+        all_locations = vocabularies['cities']
         selected_location = st.selectbox(
             "Select Location",
             all_locations,
@@ -105,7 +121,7 @@ def main():
         )
 
         # Cuisine
-        all_cuisines = sorted(recommender.data['Primary Cuisine'].str.title().unique())
+        all_cuisines = vocabularies['cuisines']
         selected_cuisines = st.multiselect(
             "Select Cuisine(s)",
             all_cuisines,
@@ -155,20 +171,18 @@ def main():
     if search_button:
         with st.spinner("Finding the best matches..."):
             try:
+                # Rating and vote minimums filter before ranking, so up to
+                # num_results restaurants that pass them come back; a slider
+                # left at its lowest value filters nothing
                 recommendations = recommender.recommend(
                     cuisines=[c.lower() for c in selected_cuisines],
                     budget_range=(budget_value, budget_value),
                     location=selected_location.lower(),
-                    top_n=num_results
+                    top_n=num_results,
+                    min_rating=min_rating if min_rating > 1.0 else None,
+                    min_votes=min_votes if min_votes > 0 else None
                 )
 
-                # Apply additional filters
-                if not recommendations.empty:
-                    recommendations = recommendations[
-                        (recommendations['Rating'] >= min_rating) &
-                        (recommendations['Votes'] >= min_votes)
-                    ]
-
                 if recommendations.empty:
                     st.warning("""
                     No matching restaurants found.  